@@ -0,0 +1,574 @@
+"""
+Benchmark-driven capacity planner and autoscaling policy generator.
+
+Measures per-request service times of the inference handler through a
+serving path for a given operation mix, then recommends how many instances
+the endpoint needs and a target-tracking value for the
+SageMakerVariantInvocationsPerInstance metric. The scaling policy can be
+registered with Application Auto Scaling directly.
+
+Service times are measured over HTTP, one request at a time, either against
+a deployed endpoint (--endpoint-name with --measure-endpoint, through
+sagemaker-runtime) or against a local /invocations worker process, so
+request parsing, socket and HTTP overhead are included. Measure the real
+endpoint when you can: the local server has no SageMaker front end or
+network hop, and it runs on the developer's machine rather than the planned
+instance type, so its numbers are only an estimate. Plans built from a
+local measurement can be printed but not registered as a scaling policy.
+
+SageMaker's model server starts one worker per vCPU and each worker serves
+one request at a time. The planner simulates an instance as that many
+workers behind one FIFO queue with Poisson arrivals and the measured
+service times, and finds the highest arrival rate whose p99 latency
+(queueing included) stays within --target-p99-ms. Instances are planned to
+run at TARGET_UTILIZATION of that rate, leaving headroom for bursts while a
+scale-out is in progress, and both the instance count and the scaling
+TargetValue are derived from it.
+
+Usage:
+    python capacity_planner.py --mix add=0.7 sin=0.3 --target-rps 500 \\
+        --target-p99-ms 50 --instance-type ml.c5.xlarge
+    python capacity_planner.py ... --measure-endpoint --endpoint-name math-calculator-endpoint
+    python capacity_planner.py ... --measure-endpoint --register \
+        --endpoint-name math-calculator-endpoint
+"""
+
+import argparse
+import heapq
+import http.client
+import json
+import math
+import multiprocessing
+import os
+import random
+import sys
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+# --- Path setup to find the 'src' directory ---
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+# Keep EMF metric records out of the benchmark output unless asked for
+os.environ.setdefault('CALCULATOR_METRICS_ENABLED', '0')
+
+from inference import (JSON_CONTENT_TYPE, input_fn, model_fn, output_fn,
+                       predict_fn)
+from validation import get_validator
+
+# vCPUs per instance type, which is also the default model server worker count
+INSTANCE_VCPUS = {
+    'ml.t2.medium': 2,
+    'ml.t2.large': 2,
+    'ml.m5.large': 2,
+    'ml.m5.xlarge': 4,
+    'ml.m5.2xlarge': 8,
+    'ml.c5.large': 2,
+    'ml.c5.xlarge': 4,
+    'ml.c5.2xlarge': 8,
+    'ml.c5.4xlarge': 16,
+}
+
+# Fraction of measured capacity each instance is planned to run at
+TARGET_UTILIZATION = 0.7
+
+SCALABLE_DIMENSION = 'sagemaker:variant:DesiredInstanceCount'
+PREDEFINED_METRIC = 'SageMakerVariantInvocationsPerInstance'
+
+SCALE_IN_COOLDOWN = 300
+SCALE_OUT_COOLDOWN = 60
+
+# Simulated arrivals per evaluated rate, and bisection steps over the rate
+SIMULATED_REQUESTS = 20000
+RATE_SEARCH_STEPS = 30
+
+# Highest worker utilization considered sustainable. Closer to 1 the queue
+# never settles, which a finite simulation cannot show.
+MAX_SUSTAINED_UTILIZATION = 0.9
+
+
+def _operands(operation, rng):
+    """Random operands valid for an operation."""
+    if get_validator().arity[operation] == 1:
+        # Positive so sqrt/log succeed; degrees for trig
+        return {'a': rng.uniform(1.0, 360.0)}
+    return {'a': rng.uniform(1.0, 100.0), 'b': rng.uniform(1.0, 10.0)}
+
+
+def build_workload(operation_mix, num_requests, rows_per_request=1, seed=0):
+    """
+    Build serialized request bodies for an operation mix.
+
+    Args:
+        operation_mix (dict): Operation name -> relative weight
+        num_requests (int): Number of request bodies to build
+        rows_per_request (int): Requests per body; >1 sends JSON arrays
+        seed (int): Random seed, so runs are repeatable
+
+    Returns:
+        list: JSON request bodies as bytes
+
+    Raises:
+        ValueError: If the mix names an unsupported operation or is empty
+    """
+    arity = get_validator().arity
+    unknown = [op for op in operation_mix if op not in arity]
+    if unknown:
+        raise ValueError(f"Unsupported operations in mix: {unknown}")
+    if not operation_mix or sum(operation_mix.values()) <= 0:
+        raise ValueError("Operation mix must have a positive total weight")
+
+    rng = random.Random(seed)
+    operations = list(operation_mix.keys())
+    weights = list(operation_mix.values())
+
+    bodies = []
+    for _ in range(num_requests):
+        rows = []
+        for operation in rng.choices(operations, weights, k=rows_per_request):
+            row = {'operation': operation}
+            row.update(_operands(operation, rng))
+            rows.append(row)
+        payload = rows[0] if rows_per_request == 1 else rows
+        bodies.append(json.dumps(payload).encode('utf-8'))
+    return bodies
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class _InvocationHandler(BaseHTTPRequestHandler):
+    """Minimal SageMaker-style /invocations and /ping handler."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    model = None
+
+    def do_GET(self):
+        self._reply(200, b'', JSON_CONTENT_TYPE)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        try:
+            data = input_fn(body, self.headers.get('Content-Type',
+                                                   JSON_CONTENT_TYPE))
+            response, content_type = output_fn(
+                predict_fn(data, self.model),
+                self.headers.get('Accept', JSON_CONTENT_TYPE))
+            status = 200
+        except ValueError as e:
+            response, content_type = json.dumps({'error': str(e)}), JSON_CONTENT_TYPE
+            status = 400
+        if isinstance(response, str):
+            response = response.encode('utf-8')
+        self._reply(status, response, content_type)
+
+    def _reply(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _serve(ports):
+    """Run one single-threaded model server worker (in a child process)."""
+    _InvocationHandler.model = model_fn(None)
+    server = HTTPServer(('127.0.0.1', 0), _InvocationHandler)
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+@contextmanager
+def _local_worker():
+    """Start a local /invocations worker; yield a function that invokes it."""
+    context = multiprocessing.get_context('spawn')
+    ports = context.Queue()
+    process = context.Process(target=_serve, args=(ports,), daemon=True)
+    process.start()
+    connection = None
+    try:
+        connection = http.client.HTTPConnection('127.0.0.1',
+                                                ports.get(timeout=60))
+        headers = {'Content-Type': JSON_CONTENT_TYPE,
+                   'Accept': JSON_CONTENT_TYPE}
+
+        def invoke(body):
+            connection.request('POST', '/invocations', body, headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                raise RuntimeError(f"Local worker returned {response.status}")
+
+        yield invoke
+    finally:
+        if connection is not None:
+            connection.close()
+        process.terminate()
+        process.join(timeout=5)
+
+
+@contextmanager
+def _endpoint(endpoint_name, client=None):
+    """Yield a function that invokes a deployed endpoint."""
+    if client is None:
+        import boto3
+        client = boto3.client('sagemaker-runtime')
+
+    def invoke(body):
+        response = client.invoke_endpoint(
+            EndpointName=endpoint_name, ContentType=JSON_CONTENT_TYPE,
+            Accept=JSON_CONTENT_TYPE, Body=body)
+        response['Body'].read()
+
+    yield invoke
+
+
+def benchmark(operation_mix, num_requests=2000, rows_per_request=1,
+              warmup=100, endpoint_name=None, client=None):
+    """
+    Measure per-request service times through a serving path.
+
+    Requests are sent one at a time, so each latency is one worker's
+    service time plus the transport overhead.
+
+    Args:
+        operation_mix (dict): Operation name -> relative weight
+        num_requests (int): Timed requests
+        rows_per_request (int): Requests per body
+        warmup (int): Untimed requests run first
+        endpoint_name (str, optional): Measure this deployed endpoint
+                                       instead of a local worker
+        client: sagemaker-runtime client for endpoint_name (created with
+                boto3 if omitted)
+
+    Returns:
+        dict: endpoint_name (None for the local worker), requests,
+              rows_per_request, requests_per_second (one worker, back to
+              back), p50_ms/p90_ms/p99_ms/max_ms and the sorted
+              service_times_ms
+    """
+    bodies = build_workload(operation_mix, warmup + num_requests,
+                            rows_per_request)
+    serving_path = (_local_worker() if endpoint_name is None
+                    else _endpoint(endpoint_name, client))
+
+    latencies = []
+    perf_counter = time.perf_counter
+    with serving_path as invoke:
+        for body in bodies[:warmup]:
+            invoke(body)
+
+        start = perf_counter()
+        for body in bodies[warmup:]:
+            t0 = perf_counter()
+            invoke(body)
+            latencies.append((perf_counter() - t0) * 1000.0)
+        elapsed = perf_counter() - start
+
+    latencies.sort()
+    return {
+        'endpoint_name': endpoint_name,
+        'requests': num_requests,
+        'rows_per_request': rows_per_request,
+        'requests_per_second': num_requests / elapsed if elapsed > 0 else 0.0,
+        'p50_ms': percentile(latencies, 0.50),
+        'p90_ms': percentile(latencies, 0.90),
+        'p99_ms': percentile(latencies, 0.99),
+        'max_ms': latencies[-1] if latencies else 0.0,
+        'service_times_ms': latencies,
+    }
+
+
+def _queue_samples(service_times_ms, num_requests, seed):
+    """Draw unit-rate inter-arrival gaps and resampled service times."""
+    rng = random.Random(seed)
+    gaps = [rng.expovariate(1.0) for _ in range(num_requests)]
+    services = rng.choices(service_times_ms, k=num_requests)
+    return gaps, services
+
+
+def simulate_p99(service_times_ms, workers, rate_rps,
+                 num_requests=SIMULATED_REQUESTS, seed=0, samples=None):
+    """
+    p99 latency of an instance at an offered load.
+
+    The instance is modelled as `workers` servers behind one FIFO queue,
+    with Poisson arrivals at rate_rps and service times resampled from the
+    measurements. Latency includes the time spent queued.
+
+    Args:
+        service_times_ms (list): Measured service times
+        workers (int): Model server workers per instance
+        rate_rps (float): Offered requests per second for the instance
+        num_requests (int): Simulated requests
+        seed (int): Random seed, so results are repeatable
+        samples (tuple, optional): Pre-drawn _queue_samples() output
+
+    Returns:
+        float: p99 latency in milliseconds
+    """
+    gaps, services = samples or _queue_samples(service_times_ms,
+                                               num_requests, seed)
+    mean_gap_ms = 1000.0 / rate_rps
+    free_at = [0.0] * workers
+    arrival = 0.0
+    latencies = []
+    for gap, service in zip(gaps, services):
+        arrival += gap * mean_gap_ms
+        start = max(arrival, heapq.heappop(free_at))
+        heapq.heappush(free_at, start + service)
+        latencies.append(start + service - arrival)
+    latencies.sort()
+    return percentile(latencies, 0.99)
+
+
+def sustainable_throughput(service_times_ms, workers, target_p99_ms,
+                           num_requests=SIMULATED_REQUESTS, seed=0):
+    """
+    Highest per-instance request rate whose simulated p99 meets the target.
+
+    Args:
+        service_times_ms (list): Measured service times
+        workers (int): Model server workers per instance
+        target_p99_ms (float): p99 latency budget, queueing included
+
+    Returns:
+        float: Requests per second, at most MAX_SUSTAINED_UTILIZATION of
+               the instance's saturation rate, or 0.0 if even an idle
+               instance misses the target (the service time itself is too
+               slow)
+    """
+    if not service_times_ms:
+        raise ValueError("Benchmark measured no requests")
+    if percentile(sorted(service_times_ms), 0.99) > target_p99_ms:
+        return 0.0
+
+    # Same random draws at every rate, so p99 grows smoothly with the rate
+    samples = _queue_samples(service_times_ms, num_requests, seed)
+    mean_service_ms = sum(service_times_ms) / len(service_times_ms)
+    ceiling = MAX_SUSTAINED_UTILIZATION * workers * 1000.0 / mean_service_ms
+    if simulate_p99(service_times_ms, workers, ceiling,
+                    samples=samples) <= target_p99_ms:
+        return ceiling
+    low, high = 0.0, ceiling
+    for _ in range(RATE_SEARCH_STEPS):
+        rate = (low + high) / 2
+        if simulate_p99(service_times_ms, workers, rate,
+                        samples=samples) <= target_p99_ms:
+            low = rate
+        else:
+            high = rate
+    return low
+
+
+def plan_capacity(benchmark_result, target_rps, target_p99_ms,
+                  instance_type='ml.t2.medium', max_capacity=None,
+                  utilization=TARGET_UTILIZATION):
+    """
+    Recommend an instance count and target-tracking value.
+
+    Args:
+        benchmark_result (dict): Output of benchmark()
+        target_rps (float): Expected peak invocations per second
+        target_p99_ms (float): p99 latency budget, queueing included
+        instance_type (str): SageMaker instance type
+        max_capacity (int, optional): Autoscaling ceiling (defaults to
+                                      twice the recommended count)
+        utilization (float): Planned fraction of the p99-limited rate
+
+    Returns:
+        dict: measured_endpoint (the benchmarked endpoint, None for a local
+              measurement), instance_type, workers_per_instance,
+              instance_capacity_rps
+              (saturation), p99_limited_rps, initial_instance_count,
+              min_capacity, max_capacity, target_invocations_per_instance
+              (per minute, as CloudWatch reports the metric) and
+              expected_p99_ms at target_rps
+
+    Raises:
+        ValueError: If the instance type is unknown, inputs are invalid, or
+                    no number of instances can meet target_p99_ms
+    """
+    if instance_type not in INSTANCE_VCPUS:
+        raise ValueError(f"Unknown instance type: {instance_type}. "
+                         f"Known types: {list(INSTANCE_VCPUS.keys())}")
+    if target_rps <= 0:
+        raise ValueError("target_rps must be positive")
+    if not 0.0 < utilization <= 1.0:
+        raise ValueError(f"utilization must be in (0, 1], got {utilization}")
+
+    service_times = benchmark_result['service_times_ms']
+    workers = INSTANCE_VCPUS[instance_type]
+    p99_limited_rps = sustainable_throughput(service_times, workers,
+                                             target_p99_ms)
+    if p99_limited_rps <= 0:
+        raise ValueError(
+            f"Measured service p99 of {benchmark_result['p99_ms']:.3f} ms "
+            f"exceeds the {target_p99_ms} ms target; more instances will "
+            "not help, consider a faster instance type or smaller batches")
+
+    planned_rps = p99_limited_rps * utilization
+    instance_count = max(1, math.ceil(target_rps / planned_rps))
+    if max_capacity is None:
+        max_capacity = instance_count * 2
+    max_capacity = max(max_capacity, instance_count)
+    mean_service_ms = sum(service_times) / len(service_times)
+
+    return {
+        'measured_endpoint': benchmark_result.get('endpoint_name'),
+        'instance_type': instance_type,
+        'workers_per_instance': workers,
+        'instance_capacity_rps': workers * 1000.0 / mean_service_ms,
+        'p99_limited_rps': p99_limited_rps,
+        'initial_instance_count': instance_count,
+        'min_capacity': instance_count,
+        'max_capacity': max_capacity,
+        # SageMakerVariantInvocationsPerInstance is a per-minute sum
+        'target_invocations_per_instance': math.floor(planned_rps * 60),
+        'expected_p99_ms': simulate_p99(service_times, workers,
+                                        target_rps / instance_count),
+    }
+
+
+def scaling_resource_id(endpoint_name, variant_name='AllTraffic'):
+    """Application Auto Scaling resource ID of an endpoint variant."""
+    return f"endpoint/{endpoint_name}/variant/{variant_name}"
+
+
+def check_registrable(plan):
+    """
+    Refuse a plan that was not measured on a deployed endpoint.
+
+    A local worker runs on the developer's machine, so scaling its rate by
+    the planned instance's vCPUs can overstate capacity many times over and
+    give a TargetValue the endpoint never reaches.
+
+    Raises:
+        ValueError: If the plan was built from a local measurement
+    """
+    if plan.get('measured_endpoint') is None:
+        raise ValueError("Capacity plan was measured on a local worker; "
+                         "re-run the benchmark against a deployed endpoint "
+                         "(--measure-endpoint) before registering it")
+
+
+def register_scaling_policy(endpoint_name, plan, variant_name='AllTraffic',
+                            client=None):
+    """
+    Register the endpoint variant with Application Auto Scaling and attach a
+    target-tracking policy on SageMakerVariantInvocationsPerInstance.
+
+    Args:
+        endpoint_name (str): Deployed endpoint name
+        plan (dict): Output of plan_capacity()
+        variant_name (str): Production variant name
+        client: Application Auto Scaling client (created with boto3 if
+                omitted)
+
+    Returns:
+        dict: The put_scaling_policy response
+
+    Raises:
+        ValueError: If the plan was built from a local measurement
+    """
+    check_registrable(plan)
+    if client is None:
+        import boto3
+        client = boto3.client('application-autoscaling')
+
+    resource_id = scaling_resource_id(endpoint_name, variant_name)
+    client.register_scalable_target(
+        ServiceNamespace='sagemaker',
+        ResourceId=resource_id,
+        ScalableDimension=SCALABLE_DIMENSION,
+        MinCapacity=plan['min_capacity'],
+        MaxCapacity=plan['max_capacity'],
+    )
+    return client.put_scaling_policy(
+        PolicyName=f"{endpoint_name}-invocations-target-tracking",
+        ServiceNamespace='sagemaker',
+        ResourceId=resource_id,
+        ScalableDimension=SCALABLE_DIMENSION,
+        PolicyType='TargetTrackingScaling',
+        TargetTrackingScalingPolicyConfiguration={
+            'TargetValue': float(plan['target_invocations_per_instance']),
+            'PredefinedMetricSpecification': {
+                'PredefinedMetricType': PREDEFINED_METRIC,
+            },
+            'ScaleInCooldown': SCALE_IN_COOLDOWN,
+            'ScaleOutCooldown': SCALE_OUT_COOLDOWN,
+        },
+    )
+
+
+def parse_mix(items):
+    """Parse ['add=0.7', 'sin=0.3'] into {'add': 0.7, 'sin': 0.3}."""
+    mix = {}
+    for item in items:
+        operation, _, weight = item.partition('=')
+        mix[operation] = float(weight) if weight else 1.0
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the handler and plan endpoint capacity.")
+    parser.add_argument('--mix', nargs='+', default=['add=1'],
+                        help="Operation weights, e.g. add=0.7 sin=0.3")
+    parser.add_argument('--target-rps', type=float, required=True)
+    parser.add_argument('--target-p99-ms', type=float, required=True)
+    parser.add_argument('--instance-type', default='ml.t2.medium',
+                        choices=sorted(INSTANCE_VCPUS))
+    parser.add_argument('--rows-per-request', type=int, default=1)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--max-capacity', type=int, default=None)
+    parser.add_argument('--measure-endpoint', action='store_true',
+                        help="Measure --endpoint-name instead of a local worker")
+    parser.add_argument('--register', action='store_true',
+                        help="Register the scaling policy for --endpoint-name "
+                             "(requires --measure-endpoint)")
+    parser.add_argument('--endpoint-name', default='math-calculator-endpoint')
+    args = parser.parse_args()
+    if args.register and not args.measure_endpoint:
+        parser.error("--register requires --measure-endpoint; a plan from "
+                     "a local worker does not reflect the instance type")
+
+    result = benchmark(parse_mix(args.mix), args.requests,
+                       args.rows_per_request,
+                       endpoint_name=(args.endpoint_name
+                                      if args.measure_endpoint else None))
+    try:
+        plan = plan_capacity(result, args.target_rps, args.target_p99_ms,
+                             args.instance_type, args.max_capacity)
+    except ValueError as e:
+        sys.exit(f"Error: {e}")
+
+    print("=== Benchmark (single worker, one request at a time) ===")
+    for key, value in result.items():
+        if key == 'service_times_ms':
+            continue
+        print(f"  {key}: {value:.3f}" if isinstance(value, float)
+              else f"  {key}: {value}")
+    print("\n=== Capacity Plan ===")
+    for key, value in plan.items():
+        print(f"  {key}: {value:.3f}" if isinstance(value, float)
+              else f"  {key}: {value}")
+
+    if args.register:
+        register_scaling_policy(args.endpoint_name, plan)
+        print(f"\nRegistered target-tracking policy for {args.endpoint_name}")
+
+
+if __name__ == "__main__":
+    main()
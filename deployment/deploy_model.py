@@ -4,23 +4,67 @@ from sagemaker.pytorch import PyTorchModel
 from sagemaker import get_execution_role
 import tarfile
 import os
+import sys
+from pathlib import Path
 
-def create_model_tar():
-    """Create model.tar.gz with inference code"""
+# --- Path setup to find the 'src' directory ---
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+# Inference source files packaged into model.tar.gz under code/. The
+# container pip-installs code/requirements.txt before loading inference.py.
+SOURCE_FILES = [
+    'calculator_model.py',
+    'content_encoding.py',
+    'inference.py',
+    'metrics.py',
+    'precision.py',
+    'requirements.txt',
+    'shared_cache.py',
+    'sweep.py',
+    'validation.py',
+    'warm_state.py',
+]
+
+def create_model_tar(snapshot_cache=None):
+    """Create model.tar.gz with inference code and warm-start state
+
+    Args:
+        snapshot_cache (str, optional): Name of a shared result cache on this
+            machine to ship as the warm-start cache snapshot, e.g. one filled
+            by running local_batch_transform.py on representative input with
+            CALCULATOR_SHARED_CACHE set to that name
+    """
     # Create code directory structure
     os.makedirs('code', exist_ok=True)
     
     # Copy source files to code directory
     import shutil
-    shutil.copy('../src/calculator_model.py', 'code/')
-    shutil.copy('../src/inference.py', 'code/')
+    for source_file in SOURCE_FILES:
+        shutil.copy(os.path.join('../src', source_file), 'code/')
+    
+    # Precompute the state model_fn loads from model_dir
+    from warm_state import WARM_STATE_DIR, build_warm_state
+    cache = None
+    if snapshot_cache is not None:
+        from shared_cache import SharedResultCache
+        cache = SharedResultCache(snapshot_cache)
+    try:
+        manifest = build_warm_state(WARM_STATE_DIR, cache=cache)
+    finally:
+        if cache is not None:
+            cache.close()
+    if 'cache_snapshot' in manifest['files']:
+        print(f"Cache snapshot: {manifest['files']['cache_snapshot']['entries']} entries")
     
     # Create tar file
     with tarfile.open('model.tar.gz', 'w:gz') as tar:
         tar.add('code', arcname='code')
+        tar.add(WARM_STATE_DIR, arcname=WARM_STATE_DIR)
     
     # Cleanup
     shutil.rmtree('code')
+    shutil.rmtree(WARM_STATE_DIR)
     print("Created model.tar.gz")
 
 def delete_existing_endpoint(endpoint_name):
@@ -43,8 +87,26 @@ def delete_existing_endpoint(endpoint_name):
     except:
         print(f"No existing endpoint found: {endpoint_name}")
 
-def deploy_calculator_model():
-    """Deploy the calculator model to SageMaker"""
+def deploy_calculator_model(instance_type='ml.t2.medium',
+                            initial_instance_count=1, scaling_plan=None,
+                            snapshot_cache=None):
+    """Deploy the calculator model to SageMaker
+
+    Args:
+        instance_type (str): Endpoint instance type
+        initial_instance_count (int): Number of instances to start with
+        scaling_plan (dict, optional): Output of
+            capacity_planner.plan_capacity() for a benchmark of a deployed
+            endpoint. Overrides the instance type and count, and registers a
+            target-tracking autoscaling policy.
+        snapshot_cache (str, optional): Shared result cache to ship as the
+            warm-start snapshot (see create_model_tar)
+    """
+    if scaling_plan is not None:
+        from capacity_planner import check_registrable
+        check_registrable(scaling_plan)
+        instance_type = scaling_plan['instance_type']
+        initial_instance_count = scaling_plan['initial_instance_count']
     
     sagemaker_session = sagemaker.Session()
     
@@ -57,7 +119,7 @@ def deploy_calculator_model():
         # For local development, you'll need to set this
         role = input("Enter your SageMaker execution role ARN: ")
     
-    create_model_tar()
+    create_model_tar(snapshot_cache)
     
     # Upload to S3
     bucket = sagemaker_session.default_bucket()
@@ -81,12 +143,20 @@ def deploy_calculator_model():
     
     # Deploy endpoint
     predictor = pytorch_model.deploy(
-        initial_instance_count=1,
-        instance_type='ml.t2.medium',
+        initial_instance_count=initial_instance_count,
+        instance_type=instance_type,
         endpoint_name='math-calculator-endpoint'
     )
     
     print(f"Model deployed to endpoint: {predictor.endpoint_name}")
+
+    if scaling_plan is not None:
+        from capacity_planner import register_scaling_policy
+        register_scaling_policy(predictor.endpoint_name, scaling_plan)
+        print(f"Autoscaling: {scaling_plan['min_capacity']}-"
+              f"{scaling_plan['max_capacity']} instances, target "
+              f"{scaling_plan['target_invocations_per_instance']} "
+              "invocations/instance/minute")
     return predictor
 
 def get_endpoint_logs(endpoint_name):
@@ -0,0 +1,350 @@
+"""
+Local Batch Transform emulator for offline job sizing.
+
+Runs the inference handler (input_fn -> predict_fn -> output_fn) over an
+input directory the same way a SageMaker Batch Transform job would, so the
+job configuration can be chosen before paying for a real job:
+
+- SplitType=Line: every input file is split into records on newlines
+- BatchStrategy=SingleRecord: each request carries exactly one record
+- BatchStrategy=MultiRecord: records are packed into requests of up to
+  MaxPayloadInMB, joined with newlines
+- MaxConcurrentTransforms: number of worker processes, each with its own
+  model, serving requests in parallel (like the model server's workers, and
+  unlike threads, not serialized by the GIL)
+- AssembleWith=Line: response bodies are joined with newlines into
+  <input file>.out
+
+Each configuration is timed once all of its workers have loaded the model.
+Memory is each worker's peak resident set size (resource.getrusage), so it
+includes the interpreter and imported libraries as on a real instance;
+peak_memory_mb is the sum over the workers.
+
+Usage:
+    python local_batch_transform.py ../data/transform-input \\
+        --payload-mb 1 6 --concurrency 1 2 4 --memory-limit-mb 512
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from pathlib import Path
+
+# --- Path setup to find the 'src' directory ---
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+# Keep EMF metric records out of the benchmark output unless asked for
+os.environ.setdefault('CALCULATOR_METRICS_ENABLED', '0')
+
+from inference import (JSONLINES_CONTENT_TYPE, input_fn, model_fn,
+                       output_fn, predict_fn)
+
+BATCH_STRATEGIES = ('SingleRecord', 'MultiRecord')
+
+# SageMaker limits: MaxPayloadInMB <= 100 and
+# MaxPayloadInMB * MaxConcurrentTransforms <= 100
+MAX_PAYLOAD_MB = 100
+
+# Configurations within this fraction of the best throughput are treated as
+# equivalent, and the cheapest of them is recommended
+THROUGHPUT_TOLERANCE = 0.05
+
+MB = 1024 * 1024
+
+# ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+RSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+# Per-worker state, set by _init_worker in each pool process
+_worker = {}
+
+
+def split_records(path):
+    """
+    Split an input file into records on newlines (SplitType=Line).
+
+    Args:
+        path (str | Path): Input file
+
+    Returns:
+        list: Non-empty records as bytes, without line terminators
+    """
+    with open(path, 'rb') as f:
+        return [line.rstrip(b'\r\n') for line in f if line.strip()]
+
+
+def build_payloads(records, batch_strategy, max_payload_mb):
+    """
+    Group records into request payloads following the batch strategy.
+
+    Args:
+        records (list): Records from split_records()
+        batch_strategy (str): 'SingleRecord' or 'MultiRecord'
+        max_payload_mb (int): Maximum request payload size in MB
+
+    Returns:
+        list: Request bodies as bytes
+
+    Raises:
+        ValueError: If the strategy is unknown or a single record is larger
+                    than the payload limit (SageMaker fails the job too)
+    """
+    if batch_strategy not in BATCH_STRATEGIES:
+        raise ValueError(f"Unsupported batch strategy: {batch_strategy}. "
+                         f"Supported strategies: {list(BATCH_STRATEGIES)}")
+    limit = max_payload_mb * MB
+
+    for record in records:
+        if len(record) > limit:
+            raise ValueError(f"Record of {len(record)} bytes exceeds "
+                             f"MaxPayloadInMB={max_payload_mb}")
+
+    if batch_strategy == 'SingleRecord':
+        return list(records)
+
+    payloads = []
+    batch = []
+    size = 0
+    for record in records:
+        # +1 for the newline joining this record to the previous one
+        added = len(record) + (1 if batch else 0)
+        if batch and size + added > limit:
+            payloads.append(b'\n'.join(batch))
+            batch = []
+            size = 0
+            added = len(record)
+        batch.append(record)
+        size += added
+    if batch:
+        payloads.append(b'\n'.join(batch))
+    return payloads
+
+
+def _init_worker(ready, report):
+    """Load the model in a pool process, then wait for the others."""
+    _worker['model'] = model_fn(None)
+    _worker['report'] = report
+    ready.wait()
+
+
+def _invoke(payload):
+    """
+    Run one request through the handler in a pool process.
+
+    Returns:
+        tuple: (response body, number of error rows in the response)
+    """
+    data = input_fn(payload, JSONLINES_CONTENT_TYPE)
+    prediction = predict_fn(data, _worker['model'])
+    body, _ = output_fn(prediction, JSONLINES_CONTENT_TYPE)
+    return body, sum(1 for row in prediction if row['status'] == 'error')
+
+
+def _peak_rss(_):
+    """
+    Peak resident set size of this pool process, in bytes.
+
+    Every worker blocks on the report barrier, so each one answers exactly
+    one of these calls.
+    """
+    _worker['report'].wait()
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RSS_UNIT
+
+
+def run_transform(input_dir, batch_strategy='MultiRecord', max_payload_mb=6,
+                  max_concurrent_transforms=1, output_dir=None):
+    """
+    Run one emulated Batch Transform job over every file in input_dir.
+
+    Args:
+        input_dir (str | Path): Directory of JSON Lines input files
+        batch_strategy (str): 'SingleRecord' or 'MultiRecord'
+        max_payload_mb (int): MaxPayloadInMB
+        max_concurrent_transforms (int): MaxConcurrentTransforms
+        output_dir (str | Path, optional): Where to write <file>.out outputs
+
+    Returns:
+        dict: Job statistics (records, requests, errors, seconds,
+              records_per_second, peak_memory_mb over all workers,
+              peak_worker_memory_mb) and the configuration used
+    """
+    if not 1 <= max_payload_mb <= MAX_PAYLOAD_MB:
+        raise ValueError(f"MaxPayloadInMB must be between 1 and "
+                         f"{MAX_PAYLOAD_MB}, got {max_payload_mb}")
+    if max_payload_mb * max_concurrent_transforms > MAX_PAYLOAD_MB:
+        raise ValueError("MaxPayloadInMB * MaxConcurrentTransforms must not "
+                         f"exceed {MAX_PAYLOAD_MB}")
+
+    input_files = sorted(p for p in Path(input_dir).iterdir() if p.is_file())
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+
+    # Fresh interpreters, so memory is not inherited from this process
+    context = multiprocessing.get_context('spawn')
+    workers = max_concurrent_transforms
+    ready = context.Barrier(workers + 1)
+    report = context.Barrier(workers)
+
+    records = requests = errors = 0
+    with context.Pool(workers, initializer=_init_worker,
+                      initargs=(ready, report)) as pool:
+        # Start timing once every worker has loaded the model
+        ready.wait()
+        start = time.perf_counter()
+        for path in input_files:
+            file_records = split_records(path)
+            payloads = build_payloads(file_records, batch_strategy,
+                                      max_payload_mb)
+            responses = pool.map(_invoke, payloads, chunksize=1)
+            bodies = [body for body, _ in responses]
+
+            records += len(file_records)
+            requests += len(payloads)
+            errors += sum(count for _, count in responses)
+
+            if output_dir is not None:
+                # AssembleWith=Line
+                out_path = Path(output_dir) / f"{path.name}.out"
+                out_path.write_text('\n'.join(bodies) + '\n')
+        seconds = time.perf_counter() - start
+
+        peaks = pool.map(_peak_rss, range(workers), chunksize=1)
+
+    return {
+        'batch_strategy': batch_strategy,
+        'max_payload_mb': max_payload_mb,
+        'max_concurrent_transforms': max_concurrent_transforms,
+        'records': records,
+        'requests': requests,
+        'errors': errors,
+        'seconds': seconds,
+        'records_per_second': records / seconds if seconds > 0 else 0.0,
+        'peak_memory_mb': sum(peaks) / MB,
+        'peak_worker_memory_mb': max(peaks) / MB,
+    }
+
+
+def sweep(input_dir, batch_strategies=BATCH_STRATEGIES,
+          payload_sizes_mb=(1, 6), concurrency=(1, 2, 4, 8)):
+    """
+    Run every valid combination of job settings over input_dir.
+
+    Combinations SageMaker would reject (MaxPayloadInMB *
+    MaxConcurrentTransforms > 100) are skipped. SingleRecord ignores the
+    payload size beyond the per-record limit, so it is only run with the
+    smallest size.
+
+    Returns:
+        list: run_transform() results, one per configuration
+    """
+    results = []
+    for strategy in batch_strategies:
+        sizes = payload_sizes_mb
+        if strategy == 'SingleRecord':
+            sizes = [min(payload_sizes_mb)]
+        for size in sizes:
+            for workers in concurrency:
+                if size * workers > MAX_PAYLOAD_MB:
+                    continue
+                results.append(run_transform(input_dir, strategy, size,
+                                             workers))
+    return results
+
+
+def recommend(results, memory_limit_mb=None):
+    """
+    Pick a job configuration from sweep() results.
+
+    The fastest configuration that fits in memory_limit_mb is found, then the
+    configuration with the fewest concurrent transforms and smallest payload
+    among those within THROUGHPUT_TOLERANCE of it is recommended.
+
+    Args:
+        results (list): Results from sweep() or run_transform()
+        memory_limit_mb (float, optional): Peak memory budget for all
+                                           workers together
+
+    Returns:
+        dict: CreateTransformJob settings (BatchStrategy, MaxPayloadInMB,
+              MaxConcurrentTransforms, SplitType, AssembleWith, ContentType,
+              Accept) plus the measured 'stats'
+
+    Raises:
+        ValueError: If no configuration fits the memory limit
+    """
+    candidates = [r for r in results
+                  if memory_limit_mb is None
+                  or r['peak_memory_mb'] <= memory_limit_mb]
+    if not candidates:
+        raise ValueError("No configuration fits within the memory limit of "
+                         f"{memory_limit_mb} MB")
+
+    best = max(r['records_per_second'] for r in candidates)
+    good_enough = [r for r in candidates
+                   if r['records_per_second'] >= best * (1 - THROUGHPUT_TOLERANCE)]
+    chosen = min(good_enough, key=lambda r: (
+        r['max_concurrent_transforms'], r['max_payload_mb'],
+        -r['records_per_second']))
+
+    return {
+        'BatchStrategy': chosen['batch_strategy'],
+        'MaxPayloadInMB': chosen['max_payload_mb'],
+        'MaxConcurrentTransforms': chosen['max_concurrent_transforms'],
+        'SplitType': 'Line',
+        'AssembleWith': 'Line',
+        'ContentType': JSONLINES_CONTENT_TYPE,
+        'Accept': JSONLINES_CONTENT_TYPE,
+        'stats': chosen,
+    }
+
+
+def print_report(results, recommendation):
+    """Print a table of sweep results followed by the recommendation."""
+    print(f"{'Strategy':<13}{'Payload MB':>11}{'Workers':>9}{'Records':>10}"
+          f"{'Requests':>10}{'Rec/s':>12}{'Peak MB':>10}")
+    print("-" * 75)
+    for r in results:
+        print(f"{r['batch_strategy']:<13}{r['max_payload_mb']:>11}"
+              f"{r['max_concurrent_transforms']:>9}{r['records']:>10}"
+              f"{r['requests']:>10}{r['records_per_second']:>12.0f}"
+              f"{r['peak_memory_mb']:>10.1f}")
+
+    print("\nRecommended transform job configuration:")
+    for key, value in recommendation.items():
+        if key != 'stats':
+            print(f"  {key}: {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Emulate SageMaker Batch Transform locally to size a job.")
+    parser.add_argument('input_dir', help="Directory of JSON Lines input files")
+    parser.add_argument('--strategies', nargs='+', default=list(BATCH_STRATEGIES),
+                        choices=BATCH_STRATEGIES)
+    parser.add_argument('--payload-mb', nargs='+', type=int, default=[1, 6])
+    parser.add_argument('--concurrency', nargs='+', type=int,
+                        default=[1, 2, 4, 8])
+    parser.add_argument('--memory-limit-mb', type=float, default=None)
+    parser.add_argument('--output-dir', default=None,
+                        help="Write assembled outputs for the recommended "
+                             "configuration here")
+    args = parser.parse_args()
+
+    results = sweep(args.input_dir, args.strategies, args.payload_mb,
+                    args.concurrency)
+    recommendation = recommend(results, args.memory_limit_mb)
+    print_report(results, recommendation)
+
+    if args.output_dir:
+        run_transform(args.input_dir, recommendation['BatchStrategy'],
+                      recommendation['MaxPayloadInMB'],
+                      recommendation['MaxConcurrentTransforms'],
+                      output_dir=args.output_dir)
+        print(f"\nOutputs written to: {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import json
 import math
 
+import numpy as np
+
 class MathCalculator:
     """
     A comprehensive mathematical calculator supporting basic arithmetic,
@@ -33,6 +35,18 @@ class MathCalculator:
             'tan': self._tan,
             'log': self._log
         }
+        self.array_operations = {
+            'add': np.add,
+            'subtract': np.subtract,
+            'multiply': np.multiply,
+            'divide': self._divide_array,
+            'power': np.power,
+            'sqrt': np.sqrt,
+            'sin': lambda a: np.sin(np.radians(a)),
+            'cos': lambda a: np.cos(np.radians(a)),
+            'tan': lambda a: np.tan(np.radians(a)),
+            'log': np.log
+        }
     
     def _add(self, a, b):
         """Add two numbers: a + b"""
@@ -56,6 +70,11 @@ class MathCalculator:
             raise ValueError("Division by zero")
         return a / b
     
+    def _divide_array(self, a, b):
+        """Element-wise a / b; division by zero yields NaN"""
+        b = np.asarray(b, dtype=np.float64)
+        return np.divide(a, np.where(b == 0, np.nan, b))
+    
     def _power(self, a, b):
         """Raise a to the power of b: a^b"""
         return a ** b
@@ -148,4 +167,54 @@ class MathCalculator:
         try:
             return self.operations[operation](a, b)
         except Exception as e:
-            raise ValueError(f"Calculation error in '{operation}': {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Calculation error in '{operation}': {str(e)}")
+    
+    def calculate_array(self, operation, a, b=None, dtype=np.float64):
+        """
+        Perform a calculation element-wise over NumPy arrays.
+        
+        Operands broadcast against each other and are computed in float64.
+        Elements that would raise in calculate() (division by zero, square
+        root or log outside the domain, complex or overflowing results) are
+        set to NaN and flagged in the returned mask instead of raising.
+        Results can differ from calculate() in the last bit for sin, cos,
+        tan and power, which use NumPy's implementations.
+        
+        Args:
+            operation (str): The operation to perform (see calculate)
+            a (array_like): First operand
+            b (array_like, optional): Second operand (binary operations)
+            dtype: Result dtype, np.float64 (default) or np.float32
+            
+        Returns:
+            tuple: (result ndarray of dtype, boolean ndarray marking elements
+                    that failed)
+            
+        Raises:
+            ValueError: If operation is unsupported
+            
+        Examples:
+            >>> calc = MathCalculator()
+            >>> calc.calculate_array('sqrt', [16, -1])
+            (array([ 4., nan]), array([False,  True]))
+        """
+        if operation not in self.array_operations:
+            raise ValueError(f"Unsupported operation: {operation}. "
+                           f"Supported operations: {list(self.array_operations.keys())}")
+        
+        a = np.asarray(a, dtype=np.float64)
+        if b is not None:
+            b = np.asarray(b, dtype=np.float64)
+        
+        function = self.array_operations[operation]
+        with np.errstate(all='ignore'):
+            result = function(a) if b is None else function(a, b)
+            result = np.asarray(result).astype(dtype, copy=False)
+        
+        # Non-finite results from finite inputs are the array equivalent of
+        # the errors calculate() raises
+        finite_inputs = np.isfinite(a) if b is None else np.isfinite(a) & np.isfinite(b)
+        invalid = ~np.isfinite(result) & finite_inputs
+        if invalid.any():
+            result = np.where(invalid, np.nan, result).astype(dtype, copy=False)
+        return result, invalid
@@ -0,0 +1,215 @@
+"""
+Content Encoding (Compression) Support for the Inference Handler
+
+Request and response bodies may be gzip or zstd compressed. The encoding
+travels as a media-type parameter, because SageMaker forwards only the
+ContentType and Accept headers to the model:
+
+    ContentType: application/json; encoding=gzip
+    Accept:      application/jsonlines; encoding=zstd
+
+Compressed request bodies without the parameter are still recognised by
+their magic bytes. Decompression is streamed: JSON Lines bodies are parsed
+line by line straight from the decompressor, and the total decompressed
+size is capped at MAX_DECOMPRESSED_BYTES to guard against zip bombs.
+
+Responses are compressed only when the Accept header asks for an encoding
+and the serialized body is at least COMPRESSION_MIN_BYTES long; small
+responses are cheaper to send as-is.
+
+zstd requires the optional 'zstandard' package (or Python 3.14+, which
+ships compression.zstd); gzip always works.
+"""
+
+import gzip
+import io
+import os
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    from compression import zstd as stdlib_zstd
+except ImportError:
+    stdlib_zstd = None
+
+GZIP = 'gzip'
+ZSTD = 'zstd'
+IDENTITY = 'identity'
+SUPPORTED_ENCODINGS = (GZIP, ZSTD, IDENTITY)
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# Responses smaller than this are never compressed
+COMPRESSION_MIN_BYTES = int(os.environ.get('CALCULATOR_COMPRESSION_MIN_BYTES',
+                                           1024))
+
+# Upper bound on the decompressed size of a request body
+MAX_DECOMPRESSED_BYTES = int(os.environ.get(
+    'CALCULATOR_MAX_DECOMPRESSED_MB', 100)) * 1024 * 1024
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Exceptions raised by the decompressors for corrupt or truncated input
+DECODE_ERRORS = (OSError, EOFError)
+if zstandard is not None:
+    DECODE_ERRORS += (zstandard.ZstdError,)
+if stdlib_zstd is not None:
+    DECODE_ERRORS += (stdlib_zstd.ZstdError,)
+
+
+def parse_media_type(value):
+    """
+    Split a ContentType/Accept value into media type and parameters.
+
+    Args:
+        value (str): e.g. 'application/json; encoding=gzip'
+
+    Returns:
+        tuple: (media_type, params) with params as a dict of lower-cased
+               names to values
+    """
+    media_type, *params = value.split(';')
+    parsed = {}
+    for param in params:
+        name, _, param_value = param.partition('=')
+        parsed[name.strip().lower()] = param_value.strip().strip('"').lower()
+    return media_type.strip().lower(), parsed
+
+
+def zstd_available():
+    """Return True if a zstd implementation is installed."""
+    return zstandard is not None or stdlib_zstd is not None
+
+
+def _require_zstd():
+    """Raise a ValueError if zstd is requested but not installed."""
+    if not zstd_available():
+        raise ValueError("zstd content encoding requires the 'zstandard' "
+                         "package")
+
+
+def detect_encoding(body, declared=None):
+    """
+    Work out the encoding of a request body.
+
+    Args:
+        body (bytes | str): Raw request body
+        declared (str, optional): Encoding from the ContentType parameter
+
+    Returns:
+        str: One of SUPPORTED_ENCODINGS
+
+    Raises:
+        ValueError: If the declared encoding is not supported
+    """
+    if declared is not None:
+        if declared not in SUPPORTED_ENCODINGS:
+            raise ValueError(f"Unsupported content encoding: {declared}. "
+                             f"Supported encodings: {list(SUPPORTED_ENCODINGS)}")
+        return declared
+    if isinstance(body, (bytes, bytearray)):
+        if body[:2] == GZIP_MAGIC:
+            return GZIP
+        if body[:4] == ZSTD_MAGIC:
+            return ZSTD
+    return IDENTITY
+
+
+class _LimitedReader(io.RawIOBase):
+    """Binary stream wrapper that fails once too many bytes are read."""
+
+    def __init__(self, stream, limit):
+        self._stream = stream
+        self._remaining = limit
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._stream.read(len(buffer))
+        self._remaining -= len(data)
+        if self._remaining < 0:
+            raise ValueError("Decompressed request body exceeds "
+                             f"{MAX_DECOMPRESSED_BYTES // (1024 * 1024)} MB")
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def open_decoded(body, encoding):
+    """
+    Open a streaming reader over the decompressed request body.
+
+    Args:
+        body (bytes): Compressed request body
+        encoding (str): GZIP or ZSTD
+
+    Returns:
+        io.BufferedReader: Binary stream of decompressed bytes
+    """
+    raw = io.BytesIO(body)
+    if encoding == GZIP:
+        stream = gzip.GzipFile(fileobj=raw, mode='rb')
+    elif encoding == ZSTD:
+        _require_zstd()
+        if zstandard is not None:
+            stream = zstandard.ZstdDecompressor().stream_reader(raw)
+        else:
+            stream = stdlib_zstd.ZstdFile(raw, mode='rb')
+    else:
+        raise ValueError(f"Cannot decode content encoding: {encoding}")
+    return io.BufferedReader(_LimitedReader(stream, MAX_DECOMPRESSED_BYTES))
+
+
+def choose_response_encoding(accept_params):
+    """
+    Pick the response encoding requested by the Accept parameters.
+
+    Args:
+        accept_params (dict): Parameters from parse_media_type(accept)
+
+    Returns:
+        str: GZIP, ZSTD or IDENTITY
+
+    Raises:
+        ValueError: If none of the requested encodings can be produced
+    """
+    requested = accept_params.get('encoding')
+    if not requested:
+        return IDENTITY
+    # Allow a preference list such as 'encoding="zstd,gzip"'
+    for encoding in requested.split(','):
+        encoding = encoding.strip()
+        if encoding == ZSTD and not zstd_available():
+            continue
+        if encoding in SUPPORTED_ENCODINGS:
+            return encoding
+    raise ValueError(f"Unsupported accept encoding: {requested}. "
+                     f"Supported encodings: {list(SUPPORTED_ENCODINGS)}")
+
+
+def encode_body(body, encoding):
+    """
+    Compress a serialized response body.
+
+    Args:
+        body (str): Serialized response
+        encoding (str): GZIP, ZSTD or IDENTITY
+
+    Returns:
+        str | bytes: The body unchanged for IDENTITY, compressed bytes
+                     otherwise
+    """
+    if encoding == IDENTITY:
+        return body
+    data = body.encode('utf-8')
+    if encoding == GZIP:
+        return gzip.compress(data, compresslevel=GZIP_LEVEL)
+    _require_zstd()
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return stdlib_zstd.compress(data, level=ZSTD_LEVEL)
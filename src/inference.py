@@ -9,7 +9,8 @@ Expected Input Format:
 {
     "operation": "add",  # Required: operation name
     "a": 10,            # Required: first operand
-    "b": 5              # Optional: second operand (for binary operations)
+    "b": 5,             # Optional: second operand (for binary operations)
+    "precision": "float64"  # Optional: "float32", "float64" or "exact"
 }
 
 Output Format:
@@ -21,16 +22,60 @@ Output Format:
     "status": "success"
 }
 
+'a' and 'b' may also be range specs such as {"start": 0, "stop": 360,
+"step": 0.001}, evaluated server-side as a sweep or grid; see sweep.py.
+
+Request and response bodies may be gzip or zstd compressed; see
+content_encoding.py. A JSON array of request objects is also accepted; the response is then
+an array with one result per request, in order. For Batch Transform jobs,
+'application/jsonlines' bodies (one request object per line) are accepted
+and answered with one result per line.
+
 Error Format:
 {
     "error": "Error message",
+    "error_code": "INVALID_TYPE",  # See validation.py for all codes
     "status": "error"
 }
 """
 
 import json
 import os
+import time
 from calculator_model import MathCalculator
+from content_encoding import (COMPRESSION_MIN_BYTES, DECODE_ERRORS, IDENTITY,
+                              choose_response_encoding, detect_encoding,
+                              encode_body, open_decoded, parse_media_type)
+from metrics import MetricsRecorder
+from precision import (DEFAULT_PRECISION, EXACT, EXACT_MAX_BITS,
+                       apply_precision, exceeds_exact_limit)
+from shared_cache import SharedResultCache
+from sweep import run_sweep
+from validation import (CALCULATION_ERROR, DEFAULT_SCHEMA_VERSION,
+                        SweepRequest, ValidationError, get_validator)
+from warm_state import load_warm_state
+
+# Request schema version used to validate incoming requests
+SCHEMA_VERSION = os.environ.get('CALCULATOR_SCHEMA_VERSION',
+                                DEFAULT_SCHEMA_VERSION)
+
+# CloudWatch EMF metrics, flushed from a background thread.
+# Set CALCULATOR_METRICS_ENABLED=0 to disable.
+METRICS = (MetricsRecorder.from_env()
+           if os.environ.get('CALCULATOR_METRICS_ENABLED', '1') != '0'
+           else None)
+
+# Result cache shared by all workers on the instance. Set
+# CALCULATOR_SHARED_CACHE to a segment name to enable it. A lookup costs more
+# than computing any built-in operation; see shared_cache.py for numbers.
+SHARED_CACHE = SharedResultCache.from_env()
+
+# Operation dimension used for rows rejected before an operation is known
+INVALID_OPERATION = 'invalid'
+
+JSON_CONTENT_TYPE = 'application/json'
+JSONLINES_CONTENT_TYPE = 'application/jsonlines'
+SUPPORTED_CONTENT_TYPES = (JSON_CONTENT_TYPE, JSONLINES_CONTENT_TYPE)
 
 def model_fn(model_dir):
     """
@@ -38,6 +83,10 @@ def model_fn(model_dir):
     
     This function is called once when the SageMaker endpoint starts up.
     It should return the model object that will be used for predictions.
+    When the shared result cache is enabled, it is attached to the model as
+    'result_cache'. Warm-start state
+    packaged under model_dir/warm_state is loaded and applied (see
+    warm_state.py).
     
     Args:
         model_dir (str): Path to the directory containing model artifacts
@@ -45,95 +94,233 @@ def model_fn(model_dir):
     Returns:
         MathCalculator: Initialized calculator model instance
     """
-    return MathCalculator()
+    model = MathCalculator()
+    if SHARED_CACHE is not None:
+        model.result_cache = SHARED_CACHE
+    warm = load_warm_state(model_dir)
+    if warm is not None:
+        warm.apply(model)
+    return model
 
 def input_fn(request_body, content_type='application/json'):
     """
     Parse and validate input data for inference.
     
+    Compressed bodies are recognised from an 'encoding' content type
+    parameter (e.g. 'application/json; encoding=gzip') or from their magic
+    bytes, and are decompressed as they are parsed.
+    
     Args:
-        request_body (str): Raw request body from the client
+        request_body (str | bytes): Raw request body from the client
         content_type (str): Content type of the request
         
     Returns:
-        dict: Parsed input data
+        dict | list: Parsed input data (a list for batch and JSON Lines
+                     requests)
         
     Raises:
-        ValueError: If content type is not supported
+        ValueError: If content type or encoding is not supported, or the
+                    body cannot be decoded
     """
-    if content_type == 'application/json':
-        try:
-            return json.loads(request_body)
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON format: {str(e)}")
-    
-    raise ValueError(f"Unsupported content type: {content_type}. "
-                    "Only 'application/json' is supported.")
+    media_type, params = parse_media_type(content_type)
+    if media_type not in SUPPORTED_CONTENT_TYPES:
+        raise ValueError(f"Unsupported content type: {content_type}. "
+                        f"Supported content types: {list(SUPPORTED_CONTENT_TYPES)}")
+
+    encoding = detect_encoding(request_body, params.get('encoding'))
+    if encoding != IDENTITY and isinstance(request_body, str):
+        raise ValueError(f"{encoding} encoded request body must be binary")
+
+    try:
+        if media_type == JSON_CONTENT_TYPE:
+            if encoding == IDENTITY:
+                return json.loads(request_body)
+            return json.load(open_decoded(request_body, encoding))
+
+        # JSON Lines: parse line by line as the body is decompressed
+        lines = (request_body.splitlines() if encoding == IDENTITY
+                 else open_decoded(request_body, encoding))
+        return [json.loads(line) for line in lines if line.strip()]
+    except json.JSONDecodeError as e:
+        label = 'JSON' if media_type == JSON_CONTENT_TYPE else 'JSON Lines'
+        raise ValueError(f"Invalid {label} format: {str(e)}")
+    except UnicodeDecodeError as e:
+        raise ValueError(f"Invalid request body encoding: {str(e)}")
+    except DECODE_ERRORS as e:
+        raise ValueError(f"Invalid {encoding} request body: {str(e)}")
+
+def _predict_row(row, model):
+    """
+    Compute the response for one validated row.
+
+    Args:
+        row (tuple | ValidationError): Output of RequestValidator for one row
+        model (MathCalculator): Model instance from model_fn
+
+    Returns:
+        dict: Success or error response for the row
+    """
+    if isinstance(row, ValidationError):
+        if METRICS is not None:
+            # Counted without a latency sample: nothing was computed
+            METRICS.record(row.operation or INVALID_OPERATION, None, row.code)
+        return {'error': str(row), 'error_code': row.code, 'status': 'error'}
+
+    if isinstance(row, SweepRequest):
+        return _predict_sweep(row, model)
+
+    operation, a, b, precision = row
+    start = time.perf_counter()
+    cache = getattr(model, 'result_cache', None)
+    if cache is not None and not cache.cacheable(row):
+        cache = None
+    cached = cache.get(operation, a, b) if cache is not None else None
+    try:
+        if cached is not None:
+            result = apply_precision(cached, operation, precision)
+        else:
+            raw = _evaluate(model, operation, a, b, precision)
+            result = apply_precision(raw, operation, precision)
+            if cache is not None:
+                cache.put(operation, a, b, float(raw))
+    except (ValueError, ArithmeticError, TypeError) as e:
+        # TypeError covers complex results such as a negative base to a
+        # fractional power
+        if METRICS is not None:
+            METRICS.record(operation, (time.perf_counter() - start) * 1000.0,
+                           CALCULATION_ERROR)
+        return {
+            'error': f"Calculation error in '{operation}': {e}",
+            'error_code': CALCULATION_ERROR,
+            'status': 'error'
+        }
+
+    if METRICS is not None:
+        METRICS.record(operation, (time.perf_counter() - start) * 1000.0)
+    response = {
+        'operation': operation,
+        'input_a': a,
+        'input_b': b,
+        'result': result,
+        'status': 'success'
+    }
+    if precision != DEFAULT_PRECISION:
+        response['precision'] = precision
+    return response
+
+def _evaluate(model, operation, a, b, precision):
+    """
+    Compute the raw result of a validated scalar row.
+
+    Integer powers too large for the exact tier are never built: the exact
+    tier rejects them and the float tiers use float pow instead.
+    """
+    if exceeds_exact_limit(operation, a, b):
+        if precision == EXACT:
+            raise OverflowError(f"Exact result exceeds {EXACT_MAX_BITS} bits")
+        return float(a) ** float(b)
+    # The row is already validated, so dispatch straight to the operation
+    return model.operations[operation](a, b)
+
+def _predict_sweep(row, model):
+    """
+    Compute the response for a validated range/grid sweep.
+
+    Args:
+        row (SweepRequest): Validated sweep request
+        model (MathCalculator): Model instance from model_fn
+
+    Returns:
+        dict: Success response whose 'result' holds the sweep output
+    """
+    operation = row.operation
+    start = time.perf_counter()
+    result = run_sweep(model, operation, row.a, row.b, row.grid, row.output,
+                       row.precision)
+    if METRICS is not None:
+        METRICS.record(operation, (time.perf_counter() - start) * 1000.0)
+
+    def describe(operand):
+        return getattr(operand, 'spec', operand)
+
+    response = {
+        'operation': operation,
+        'input_a': describe(row.a),
+        'input_b': describe(row.b),
+        'output': row.output,
+        'result': result,
+        'status': 'success'
+    }
+    if row.precision != DEFAULT_PRECISION:
+        response['precision'] = row.precision
+    return response
 
 def predict_fn(input_data, model):
     """
     Run inference on the input data.
     
+    Requests are validated against the compiled request schema before any
+    computation, so malformed rows are rejected without touching the model.
+    
     Args:
-        input_data (dict): Parsed input data from input_fn
+        input_data (dict | list): Parsed input data from input_fn, either a
+                                  single request or a list of requests
         model (MathCalculator): Model instance from model_fn
         
     Returns:
-        dict: Prediction result with operation details and result
+        dict | list: Prediction result with operation details and result,
+                     or one result per request for list input
         
     Expected input_data format:
         {
             "operation": "add",  # Required
             "a": 10,            # Required
-            "b": 5              # Optional for unary operations
+            "b": 5,             # Required for binary operations only
+            "precision": "float64"  # Optional result precision tier
         }
     """
+    validator = get_validator(SCHEMA_VERSION)
+
+    if isinstance(input_data, list):
+        return [_predict_row(row, model)
+                for row in validator.validate_batch(input_data)]
+
     try:
-        # Validate required parameters
-        operation = input_data.get('operation')
-        a = input_data.get('a')
-        b = input_data.get('b')
-        
-        if operation is None:
-            raise ValueError("Missing required parameter: 'operation'")
-        if a is None:
-            raise ValueError("Missing required parameter: 'a'")
-        
-        # Perform calculation
-        result = model.calculate(operation, a, b)
-        
-        # Return structured response
-        return {
-            'operation': operation,
-            'input_a': a,
-            'input_b': b,
-            'result': float(result),  # Ensure result is JSON serializable
-            'status': 'success'
-        }
-    
-    except Exception as e:
-        # Return error response
-        return {
-            'error': str(e),
-            'status': 'error'
-        }
+        row = validator.validate(input_data)
+    except ValidationError as e:
+        row = e
+    return _predict_row(row, model)
 
 def output_fn(prediction, accept='application/json'):
     """
     Format the prediction output.
     
+    An 'encoding' accept parameter (e.g. 'application/json; encoding=gzip')
+    compresses responses of at least COMPRESSION_MIN_BYTES; the returned
+    content type then carries the same parameter.
+    
     Args:
-        prediction (dict): Prediction result from predict_fn
+        prediction (dict | list): Prediction result from predict_fn
         accept (str): Requested response content type
         
     Returns:
         tuple: (formatted_output, content_type)
         
     Raises:
-        ValueError: If accept type is not supported
+        ValueError: If accept type or encoding is not supported
     """
-    if accept == 'application/json':
-        return json.dumps(prediction), accept
-    
-    raise ValueError(f"Unsupported accept type: {accept}. "
-                    "Only 'application/json' is supported.")
\ No newline at end of file
+    media_type, params = parse_media_type(accept)
+    if media_type == JSON_CONTENT_TYPE:
+        body = json.dumps(prediction)
+    elif media_type == JSONLINES_CONTENT_TYPE:
+        rows = prediction if isinstance(prediction, list) else [prediction]
+        body = '\n'.join(json.dumps(row) for row in rows)
+    else:
+        raise ValueError(f"Unsupported accept type: {accept}. "
+                        f"Supported accept types: {list(SUPPORTED_CONTENT_TYPES)}")
+
+    # Only compress when asked to and when it is worth it
+    encoding = choose_response_encoding(params)
+    if encoding != IDENTITY and len(body) >= COMPRESSION_MIN_BYTES:
+        return encode_body(body, encoding), f"{media_type}; encoding={encoding}"
+    return body, media_type
@@ -0,0 +1,221 @@
+"""
+CloudWatch Embedded Metric Format (EMF) Metrics for the Math Calculator Model
+
+This module aggregates per-operation request metrics in memory and emits
+them as CloudWatch EMF records from a background thread. SageMaker ships
+container stdout to CloudWatch Logs, where EMF records are turned into
+metrics automatically, so no CloudWatch API calls are made.
+
+Recording a metric only updates an in-memory counter under a short lock;
+all JSON serialization and I/O happens on the flush thread, which wakes up
+every flush_interval seconds or as soon as max_buffered observations have
+been recorded.
+
+Emitted metrics (namespace 'SageMakerCalculator' by default):
+
+    Requests   Count         dimensions: Operation
+    Latency    Milliseconds  dimensions: Operation
+    Errors     Count         dimensions: Operation, ErrorCode
+
+Example:
+    records = []
+    recorder = MetricsRecorder(sink=records.append)
+    recorder.record('add', 0.02)
+    recorder.flush()  # records now holds the EMF JSON lines
+"""
+
+import atexit
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+DEFAULT_NAMESPACE = 'SageMakerCalculator'
+
+# EMF allows at most 100 values per metric in a single record
+MAX_VALUES_PER_RECORD = 100
+
+
+def _stdout_sink(line):
+    """Write one EMF record to stdout, where CloudWatch Logs picks it up."""
+    sys.stdout.write(line + '\n')
+    sys.stdout.flush()
+
+
+class MetricsRecorder:
+    """
+    Buffered EMF metrics recorder with a background flush thread.
+
+    Args:
+        namespace (str): CloudWatch metric namespace
+        flush_interval (float): Seconds between background flushes
+        max_buffered (int): Observations that trigger an early flush
+        sample_rate (float): Fraction of latency observations kept (0-1].
+                             Request and error counts are always exact.
+        sink (callable): Receives each EMF record as a JSON string.
+                         Defaults to writing to stdout.
+    """
+
+    def __init__(self, namespace=DEFAULT_NAMESPACE, flush_interval=60.0,
+                 max_buffered=1000, sample_rate=1.0, sink=None):
+        if not 0.0 < sample_rate <= 1.0:
+            raise ValueError(f"sample_rate must be in (0, 1], got {sample_rate}")
+        self.namespace = namespace
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self.sample_rate = sample_rate
+        self.sink = sink or _stdout_sink
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._reset()
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """
+        Create a recorder configured from environment variables.
+
+        CALCULATOR_METRICS_NAMESPACE, CALCULATOR_METRICS_FLUSH_INTERVAL,
+        CALCULATOR_METRICS_MAX_BUFFERED and CALCULATOR_METRICS_SAMPLE_RATE
+        override the constructor defaults.
+        """
+        env = os.environ
+        config = {
+            'namespace': env.get('CALCULATOR_METRICS_NAMESPACE',
+                                 DEFAULT_NAMESPACE),
+            'flush_interval': float(
+                env.get('CALCULATOR_METRICS_FLUSH_INTERVAL', 60.0)),
+            'max_buffered': int(env.get('CALCULATOR_METRICS_MAX_BUFFERED', 1000)),
+            'sample_rate': float(env.get('CALCULATOR_METRICS_SAMPLE_RATE', 1.0)),
+        }
+        config.update(kwargs)
+        return cls(**config)
+
+    def _reset(self):
+        """Swap in empty aggregation buffers (caller holds the lock)."""
+        self._requests = {}
+        self._latencies = {}
+        self._errors = {}
+        self._buffered = 0
+
+    def _ensure_started(self):
+        """Start the background flush thread on first use."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name='calculator-metrics',
+                        daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+
+    def record(self, operation, latency_ms, error_code=None):
+        """
+        Record one request observation.
+
+        Args:
+            operation (str): Operation name used as the Operation dimension
+            latency_ms (float | None): Time spent computing the result, or
+                                       None to count the request without a
+                                       latency sample (e.g. rejected rows)
+            error_code (str, optional): Error code if the request failed
+        """
+        self._ensure_started()
+        keep_latency = latency_ms is not None and (
+            self.sample_rate >= 1.0 or random.random() < self.sample_rate)
+        with self._lock:
+            self._requests[operation] = self._requests.get(operation, 0) + 1
+            if keep_latency:
+                self._latencies.setdefault(operation, []).append(latency_ms)
+            if error_code is not None:
+                key = (operation, error_code)
+                self._errors[key] = self._errors.get(key, 0) + 1
+            self._buffered += 1
+            full = self._buffered >= self.max_buffered
+        if full:
+            self._wake.set()
+
+    def _record(self, dimensions, values, metrics):
+        """Build one EMF record as a JSON string."""
+        record = {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': self.namespace,
+                    'Dimensions': [list(dimensions.keys())],
+                    'Metrics': metrics,
+                }],
+            },
+        }
+        record.update(dimensions)
+        record.update(values)
+        return json.dumps(record)
+
+    def _build_records(self, requests, latencies, errors):
+        """Turn one set of aggregation buffers into EMF records."""
+        records = []
+        for operation, count in requests.items():
+            samples = latencies.get(operation) or []
+            # Spread latency samples over as many records as EMF requires
+            chunks = [samples[i:i + MAX_VALUES_PER_RECORD]
+                      for i in range(0, len(samples), MAX_VALUES_PER_RECORD)]
+            for i, chunk in enumerate(chunks or [[]]):
+                values = {}
+                metrics = []
+                if i == 0:
+                    values['Requests'] = count
+                    metrics.append({'Name': 'Requests', 'Unit': 'Count'})
+                if chunk:
+                    values['Latency'] = chunk
+                    metrics.append({'Name': 'Latency', 'Unit': 'Milliseconds'})
+                records.append(self._record(
+                    {'Operation': operation}, values, metrics))
+
+        for (operation, error_code), count in errors.items():
+            records.append(self._record(
+                {'Operation': operation, 'ErrorCode': error_code},
+                {'Errors': count},
+                [{'Name': 'Errors', 'Unit': 'Count'}]))
+        return records
+
+    def flush(self):
+        """
+        Emit all buffered metrics to the sink.
+
+        Returns:
+            int: Number of EMF records emitted
+        """
+        with self._lock:
+            requests, latencies, errors = (
+                self._requests, self._latencies, self._errors)
+            self._reset()
+        if not requests and not errors:
+            return 0
+
+        records = self._build_records(requests, latencies, errors)
+        for line in records:
+            try:
+                self.sink(line)
+            except Exception as e:
+                # Metrics must never take the endpoint down
+                print(f"Failed to emit metrics record: {e}", file=sys.stderr)
+        return len(records)
+
+    def _run(self):
+        """Background loop: flush on interval or when the buffer fills."""
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        """Stop the flush thread and emit any remaining metrics."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self.flush()
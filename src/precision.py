@@ -0,0 +1,156 @@
+"""
+Precision Tiers for Calculator Results
+
+Clients pick a tier per request with the optional "precision" field:
+
+    float64 (default)
+        Results are IEEE-754 double precision, exactly as before. Basic
+        arithmetic is correctly rounded (relative error <= 2**-53, about
+        1.1e-16). sqrt and log come from the C math library and are within
+        1 ulp. sin/cos/tan first convert degrees to radians, which adds up
+        to 1 ulp of the argument, so results near a zero of the function
+        (e.g. sin(180)) carry an absolute error of about 1e-16 rather than
+        a small relative error.
+
+    float32
+        The float64 result rounded to single precision (relative error
+        <= 2**-24, about 6.0e-8) and serialized with the shortest digits
+        that round-trip through float32, usually 7-8 significant digits.
+        The shortened decimal adds at most another half float32 ulp, so the
+        JSON value is within 2**-23 (about 1.2e-7) of the float64 result
+        for magnitudes above FLOAT32_MIN_NORMAL (about 1.2e-38); below that
+        the absolute error is <= 2**-149. Results whose magnitude exceeds
+        FLOAT32_MAX fail with an overflow error instead of returning
+        infinity. Array-producing paths use float32 storage, halving memory
+        traffic and binary payload size.
+
+    exact
+        add, subtract, multiply and power on integer operands return the
+        exact integer result (no rounding, error 0), limited to
+        EXACT_MAX_BITS bits. Every other case falls back to float64.
+
+Integer power results are sized from abs(b) * log2(abs(a)) before they are
+computed, so a request such as 7 ** 30000000 is rejected (exact tier) or
+evaluated with float pow (other tiers, where it overflows) immediately
+instead of building a multi-million-bit integer first.
+"""
+
+import math
+
+import numpy as np
+
+FLOAT32 = 'float32'
+FLOAT64 = 'float64'
+EXACT = 'exact'
+
+PRECISION_TIERS = (FLOAT32, FLOAT64, EXACT)
+DEFAULT_PRECISION = FLOAT64
+
+# Documented error bounds, relative to the true value for float64 and to
+# the float64 result for serialized float32 values
+FLOAT64_RELATIVE_ERROR = 2.0 ** -53
+FLOAT32_RELATIVE_ERROR = 2.0 ** -23
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+FLOAT32_MIN_NORMAL = float(np.finfo(np.float32).tiny)
+
+# Operations whose integer results are returned unrounded in the exact tier
+EXACT_OPERATIONS = frozenset(('add', 'subtract', 'multiply', 'power'))
+
+# Largest exact integer result returned, in bits (about 1233 decimal digits)
+EXACT_MAX_BITS = 4096
+
+# Integers beyond this magnitude are not exactly representable in float64
+MAX_EXACT_FLOAT_INT = 2 ** 53
+
+NUMPY_DTYPES = {
+    FLOAT32: np.float32,
+    FLOAT64: np.float64,
+    EXACT: np.float64,
+}
+
+
+def float64_exact(operation, a, b, precision):
+    """
+    Return True if a row's result is fully described by a float64 value
+    computed from float64 operands.
+
+    That is not the case when the exact tier returns an unrounded integer,
+    or when an int operand is too large to convert to float64 exactly.
+
+    Args:
+        operation (str): Operation name
+        a, b: Validated operands (b None for unary operations)
+        precision (str): One of PRECISION_TIERS
+    """
+    integers = type(a) is int and (b is None or type(b) is int)
+    if integers and precision == EXACT and operation in EXACT_OPERATIONS:
+        return False
+    for operand in (a, b):
+        if type(operand) is int and abs(operand) > MAX_EXACT_FLOAT_INT:
+            return False
+    return True
+
+
+def exceeds_exact_limit(operation, a, b):
+    """
+    Estimate, without computing it, whether an integer power result is
+    larger than EXACT_MAX_BITS bits.
+
+    Args:
+        operation (str): Operation name
+        a, b: Validated operands
+
+    Returns:
+        bool: True for 'power' on ints whose result would be too large
+    """
+    if (operation != 'power' or type(a) is not int or type(b) is not int
+            or b <= 0 or abs(a) <= 1):
+        return False
+    return b * math.log2(abs(a)) > EXACT_MAX_BITS
+
+
+def shortest_float32(value):
+    """
+    Round a number to float32 and return it as the float with the fewest
+    decimal digits that round-trip through float32.
+
+    json.dumps then writes those digits (e.g. 0.017452406) rather than the
+    17 significant digits of the float32 value widened to float64.
+    """
+    # str() of a float32 gives its shortest round-trip digits
+    return float(str(np.float32(value)))
+
+
+def numpy_dtype(precision):
+    """Return the NumPy dtype used for array results in a precision tier."""
+    return NUMPY_DTYPES[precision]
+
+
+def apply_precision(result, operation, precision=DEFAULT_PRECISION):
+    """
+    Convert a raw operation result to the representation of a tier.
+
+    Args:
+        result (int | float): Value returned by a MathCalculator operation
+        operation (str): Operation that produced the result
+        precision (str): One of PRECISION_TIERS
+
+    Returns:
+        int | float: int for exact integer results, float otherwise
+
+    Raises:
+        OverflowError: If the result does not fit the requested tier
+        TypeError: If the result is not a real number (e.g. complex)
+    """
+    if precision == EXACT and type(result) is int and operation in EXACT_OPERATIONS:
+        if result.bit_length() > EXACT_MAX_BITS:
+            raise OverflowError(
+                f"Exact result exceeds {EXACT_MAX_BITS} bits")
+        return result
+
+    value = float(result)
+    if precision == FLOAT32:
+        if math.isfinite(value) and abs(value) > FLOAT32_MAX:
+            raise OverflowError("Result out of range for float32")
+        return shortest_float32(value)
+    return value
@@ -0,0 +1,391 @@
+"""
+Cross-Worker Shared Result Cache
+
+SageMaker multi-worker containers run one Python process per worker. This
+cache lives in a named shared-memory segment so every worker on an instance
+shares one warm cache of (operation, a, b) -> float64 result, at a fixed
+memory cost of 32 bytes per slot regardless of the worker count.
+
+Layout: a 16-byte header (magic, layout version, slot count, clock hand)
+followed by a fixed-size open-addressing hash table. Each 32-byte slot is
+
+    seq     uint32   seqlock counter, odd while the slot is being written
+    ref     uint8    CLOCK reference bit, set on every hit
+    used    uint8    1 once the slot holds an entry
+    op      uint8    operation code (OPERATION_CODES)
+    flags   uint8    HAS_B / A_INT / B_INT bits describing the operands
+    a, b    float64  operands
+    result  float64  cached result
+
+Workers open (or create) the segment while holding a blocking flock on the
+lock file, so nobody attaches to a segment that is still being sized or
+initialized. A segment left uninitialized by a creator that died, or with
+another layout, is removed and recreated under the same lock. from_env()
+runs without the cache (returns None) rather than failing the import if the
+segment cannot be opened.
+
+Reads never lock: a reader copies the slot and retries if the seqlock
+counter was odd or changed meanwhile. Writers serialize through a
+non-blocking flock on a lock file; if another worker is writing, the insert
+is simply skipped, so the request path never waits on the cache. Keys are
+probed linearly over PROBE_LIMIT slots, and when all of them are taken the
+CLOCK algorithm evicts the first one whose reference bit is clear.
+
+Only float64 results are cached. Keys compare operands bit for bit and
+record which operands were ints, since int arithmetic (e.g. power) can round
+differently from the float path.
+
+Cost: a get() takes 2-4 µs and a put() about 5 µs in CPython, mostly struct
+packing and hashing. Computing any built-in MathCalculator operation takes
+about 0.2 µs. With the cache enabled, predict_fn is therefore slower on hits
+(e.g. add 7.5 µs vs 4.1 µs, power 4.5 µs vs 1.8 µs) and slower still on
+misses. It only pays off for operations that take well over 10 µs to
+compute, so it is off unless CALCULATOR_SHARED_CACHE is set.
+
+Example:
+    cache = SharedResultCache('calculator-cache', slots=1 << 16)
+    cache.put('add', 1.5, 2.0, 3.5)
+    cache.get('add', 1.5, 2.0)  # 3.5, from any process on the instance
+"""
+
+import fcntl
+import os
+import struct
+import sys
+import tempfile
+import threading
+from multiprocessing import shared_memory
+
+# Used by multiprocessing.shared_memory itself; removes segments without
+# going through the resource tracker, and also ones too broken (e.g.
+# zero-sized) for SharedMemory to open
+import _posixshmem
+
+from precision import float64_exact
+
+try:
+    from multiprocessing import resource_tracker
+except ImportError:
+    resource_tracker = None
+
+MAGIC = 0x43414C43  # 'CALC'
+LAYOUT_VERSION = 1
+
+HEADER = struct.Struct('<IIII')
+SLOT = struct.Struct('<IBBBBddd')
+SEQ = struct.Struct('<I')
+
+# Byte offset of the reference bit within a slot
+REF_OFFSET = 4
+
+# Slot flag bits
+HAS_B = 1
+A_INT = 2
+B_INT = 4
+
+# Slots probed for a key before evicting
+PROBE_LIMIT = 8
+
+# Reader retries while a slot is being rewritten
+READ_RETRIES = 4
+
+# Stable operation codes shared by every worker (never renumber)
+OPERATION_CODES = {
+    'add': 1,
+    'subtract': 2,
+    'multiply': 3,
+    'divide': 4,
+    'power': 5,
+    'sqrt': 6,
+    'sin': 7,
+    'cos': 8,
+    'tan': 9,
+    'log': 10,
+}
+
+OPERATION_NAMES = {code: name for name, code in OPERATION_CODES.items()}
+
+DEFAULT_SLOTS = 1 << 20  # 32 MB
+
+_DOUBLE = struct.Struct('<d')
+_BITS = struct.Struct('<Q')
+
+
+def _bits(value):
+    """Raw IEEE-754 bits of a float."""
+    return _BITS.unpack(_DOUBLE.pack(value))[0]
+
+
+def _untrack(shm):
+    """
+    Stop the resource tracker from unlinking a segment when this process
+    exits; other workers are still using it.
+    """
+    if resource_tracker is None:
+        return
+    try:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except Exception:
+        pass
+
+
+def _initialized(shm):
+    """Return True if a segment holds a complete table of this layout."""
+    if shm.size < HEADER.size:
+        return False
+    magic, version, slots, _ = HEADER.unpack_from(shm.buf, 0)
+    return (magic == MAGIC and version == LAYOUT_VERSION
+            and slots >= PROBE_LIMIT
+            and shm.size >= HEADER.size + slots * SLOT.size)
+
+
+class SharedResultCache:
+    """
+    Fixed-size result cache shared by all processes that open the same name.
+
+    The first process to open a name creates and initializes the segment;
+    later processes attach to it. Both happen under the cross-process lock.
+
+    Args:
+        name (str): Shared-memory segment name
+        slots (int): Number of hash table slots (used only on creation)
+    """
+
+    def __init__(self, name, slots=DEFAULT_SLOTS):
+        if slots < PROBE_LIMIT:
+            raise ValueError(f"slots must be at least {PROBE_LIMIT}, got {slots}")
+        self.name = name
+        self._lock_path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+        self._lock_file = open(self._lock_path, 'a')
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                self._shm = self._open(slots)
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        except BaseException:
+            self._lock_file.close()
+            raise
+
+        self._buf = self._shm.buf
+        _, _, self.slots, _ = HEADER.unpack_from(self._buf, 0)
+        self._thread_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls):
+        """
+        Open the cache named by CALCULATOR_SHARED_CACHE, if set.
+
+        CALCULATOR_SHARED_CACHE_SLOTS sets the slot count.
+
+        Returns:
+            SharedResultCache | None: The cache, or None when disabled
+        """
+        name = os.environ.get('CALCULATOR_SHARED_CACHE')
+        if not name:
+            return None
+        try:
+            slots = int(os.environ.get('CALCULATOR_SHARED_CACHE_SLOTS',
+                                       DEFAULT_SLOTS))
+            return cls(name, slots)
+        except (OSError, ValueError) as e:
+            print(f"Shared result cache '{name}' disabled: {e}",
+                  file=sys.stderr)
+            return None
+
+    @staticmethod
+    def cacheable(row):
+        """Return True if a validated row's result can be cached as float64."""
+        return float64_exact(row.operation, row.a, row.b, row.precision)
+
+    def _open(self, slots):
+        """
+        Attach to the named segment, creating or recreating it if needed
+        (caller holds the lock).
+        """
+        try:
+            return self._create(slots)
+        except FileExistsError:
+            pass
+
+        try:
+            shm = shared_memory.SharedMemory(name=self.name)
+        except ValueError:
+            # Zero-sized: the creator died before sizing it
+            shm = None
+        if shm is not None:
+            _untrack(shm)
+            if _initialized(shm):
+                return shm
+            shm.close()
+
+        # Nobody else can be initializing it while we hold the lock, so the
+        # segment was abandoned (or has another layout): start over
+        print(f"Recreating stale shared result cache '{self.name}'",
+              file=sys.stderr)
+        _posixshmem.shm_unlink('/' + self.name)
+        return self._create(slots)
+
+    def _create(self, slots):
+        """Create and initialize a new segment (caller holds the lock)."""
+        shm = shared_memory.SharedMemory(name=self.name, create=True,
+                                         size=HEADER.size + slots * SLOT.size)
+        _untrack(shm)
+        HEADER.pack_into(shm.buf, 0, MAGIC, LAYOUT_VERSION, slots, 0)
+        return shm
+
+    def _key(self, operation, a, b):
+        """Return (op code, a, b, flags, first slot) for a lookup key."""
+        code = OPERATION_CODES[operation]
+        flags = A_INT if type(a) is int else 0
+        if b is not None:
+            flags |= HAS_B | (B_INT if type(b) is int else 0)
+        a = float(a)
+        b = float(b) if b is not None else 0.0
+        index = hash((code, flags, _bits(a), _bits(b))) % self.slots
+        return code, a, b, flags, index
+
+    def _offset(self, index):
+        return HEADER.size + (index % self.slots) * SLOT.size
+
+    def get(self, operation, a, b=None):
+        """
+        Look up a cached result without taking any lock.
+
+        Returns:
+            float | None: Cached result, or None on a miss
+        """
+        code, a, b, flags, index = self._key(operation, a, b)
+        a_bits, b_bits = _bits(a), _bits(b)
+        buf = self._buf
+        for probe in range(PROBE_LIMIT):
+            offset = self._offset(index + probe)
+            for _ in range(READ_RETRIES):
+                seq, _, used, slot_op, slot_flags, slot_a, slot_b, result = \
+                    SLOT.unpack_from(buf, offset)
+                if seq & 1 == 0 and SEQ.unpack_from(buf, offset)[0] == seq:
+                    break
+            else:
+                # Slot kept changing under us; treat as a miss
+                self.misses += 1
+                return None
+            if not used:
+                break
+            if (slot_op == code and slot_flags == flags
+                    and _bits(slot_a) == a_bits and _bits(slot_b) == b_bits):
+                buf[offset + REF_OFFSET] = 1
+                self.hits += 1
+                return result
+        self.misses += 1
+        return None
+
+    def put(self, operation, a, b, result):
+        """
+        Insert a result, evicting with CLOCK when the probe window is full.
+
+        Skipped without waiting if another writer holds the lock.
+
+        Returns:
+            bool: True if the entry was written
+        """
+        code, a, b, flags, index = self._key(operation, a, b)
+        if not self._thread_lock.acquire(blocking=False):
+            return False
+        try:
+            try:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            try:
+                self._write(self._find_slot(code, a, b, flags, index),
+                            code, a, b, flags, float(result))
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        finally:
+            self._thread_lock.release()
+        return True
+
+    def _find_slot(self, code, a, b, flags, index):
+        """Pick the slot to write (caller holds the write lock)."""
+        buf = self._buf
+        a_bits, b_bits = _bits(a), _bits(b)
+        for probe in range(PROBE_LIMIT):
+            offset = self._offset(index + probe)
+            _, _, used, slot_op, slot_flags, slot_a, slot_b, _ = \
+                SLOT.unpack_from(buf, offset)
+            if not used:
+                return offset
+            if (slot_op == code and slot_flags == flags
+                    and _bits(slot_a) == a_bits and _bits(slot_b) == b_bits):
+                return offset
+
+        # CLOCK over the probe window, starting at the shared hand
+        magic, version, slots, hand = HEADER.unpack_from(buf, 0)
+        for step in range(2 * PROBE_LIMIT):
+            offset = self._offset(index + (hand + step) % PROBE_LIMIT)
+            if buf[offset + REF_OFFSET]:
+                buf[offset + REF_OFFSET] = 0
+                continue
+            HEADER.pack_into(buf, 0, magic, version, slots,
+                             (hand + step + 1) % PROBE_LIMIT)
+            return offset
+        return self._offset(index + hand % PROBE_LIMIT)
+
+    def _write(self, offset, code, a, b, flags, result):
+        """Write a slot under its seqlock (caller holds the write lock)."""
+        buf = self._buf
+        seq = SEQ.unpack_from(buf, offset)[0]
+        SEQ.pack_into(buf, offset, (seq + 1) & 0xFFFFFFFF)
+        SLOT.pack_into(buf, offset, (seq + 1) & 0xFFFFFFFF, 0, 1, code,
+                       flags, a, b, result)
+        SEQ.pack_into(buf, offset, (seq + 2) & 0xFFFFFFFF)
+
+    def entries(self):
+        """
+        Yield every cached entry, e.g. to save a warm-start snapshot.
+
+        Operands come back as ints where they were cached as ints. Slots
+        being rewritten during the scan are skipped.
+
+        Yields:
+            tuple: (operation, a, b, result), with b None for unary entries
+        """
+        buf = self._buf
+        for index in range(self.slots):
+            offset = self._offset(index)
+            seq, _, used, code, flags, a, b, result = SLOT.unpack_from(buf, offset)
+            if (not used or seq & 1 or code not in OPERATION_NAMES
+                    or SEQ.unpack_from(buf, offset)[0] != seq):
+                continue
+            a = int(a) if flags & A_INT else a
+            if flags & HAS_B:
+                b = int(b) if flags & B_INT else b
+            else:
+                b = None
+            yield OPERATION_NAMES[code], a, b, result
+
+    def stats(self):
+        """Return this process's hit/miss counts and the table size."""
+        return {'hits': self.hits, 'misses': self.misses, 'slots': self.slots,
+                'bytes': HEADER.size + self.slots * SLOT.size}
+
+    def close(self):
+        """Detach from the segment (other processes keep using it)."""
+        self._buf = None
+        self._shm.close()
+        self._lock_file.close()
+
+    def unlink(self):
+        """Remove the segment and lock file for good."""
+        # Not SharedMemory.unlink(): it would unregister the segment from the
+        # resource tracker a second time (see _untrack)
+        try:
+            _posixshmem.shm_unlink('/' + self.name)
+        except FileNotFoundError:
+            pass
+        try:
+            os.remove(self._lock_path)
+        except FileNotFoundError:
+            pass
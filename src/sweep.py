@@ -0,0 +1,285 @@
+"""
+Server-Side Range and Grid Sweeps
+
+Instead of uploading large operand arrays, clients can describe 'a' and/or
+'b' as ranges that the server generates itself:
+
+    {"start": 0, "stop": 360, "step": 0.001}          # like numpy.arange
+    {"linspace": {"start": 1, "stop": 10, "num": 50}}  # like numpy.linspace
+
+Two ranges are combined element-wise (they must have the same length), or
+as a Cartesian grid when the request sets "grid": true, in which case the
+result has shape (len(a), len(b)). A plain number is broadcast against a
+range.
+
+Operands are generated lazily, CHUNK_SIZE elements at a time, and fed to
+MathCalculator.calculate_array. The "output" field selects the result form:
+
+    summary (default)  count, invalid, min, max, mean, argmin, argmax,
+                       computed chunk by chunk without materializing the sweep
+    binary             base64 of the little-endian result array (float64, or
+                       float32 with "precision": "float32")
+    values             JSON list, NaN for failed elements rendered as null;
+                       float32 results use the same shortest digits as the
+                       scalar float32 tier (precision.shortest_float32)
+
+Every sweep is limited to MAX_SWEEP_ELEMENTS. binary and values results are
+returned in the response body, so their size is bounded instead: output_bytes
+gives the worst-case serialized size for an output form and precision, and
+the sweeps of one request (all rows of a batch together) must fit in
+RESPONSE_BUDGET_BYTES, i.e. MAX_RESPONSE_BYTES (SageMaker's 6 MB real-time
+response limit) less RESPONSE_RESERVE_BYTES for the rest of the response.
+Failed elements (e.g. log of a non-positive number) are NaN and counted in
+"invalid" rather than failing the request.
+"""
+
+import base64
+import math
+import os
+
+import numpy as np
+
+from precision import numpy_dtype, shortest_float32
+
+SUMMARY = 'summary'
+BINARY = 'binary'
+VALUES = 'values'
+SWEEP_OUTPUTS = (SUMMARY, BINARY, VALUES)
+
+# Elements computed per chunk
+CHUNK_SIZE = 1 << 20
+
+MAX_SWEEP_ELEMENTS = int(os.environ.get('CALCULATOR_MAX_SWEEP_ELEMENTS',
+                                        100_000_000))
+
+# SageMaker real-time endpoints fail responses larger than 6 MB
+MAX_RESPONSE_BYTES = int(os.environ.get('CALCULATOR_MAX_RESPONSE_BYTES',
+                                        6 * 1024 * 1024))
+# Left for the response envelope, summaries and scalar rows
+RESPONSE_RESERVE_BYTES = 64 * 1024
+RESPONSE_BUDGET_BYTES = MAX_RESPONSE_BYTES - RESPONSE_RESERVE_BYTES
+
+# Longest JSON value plus its ', ' separator: '-2.2250738585072014e-308'
+# for float64, '-1.17549435e-38' for shortest float32 digits
+VALUE_BYTES = {np.float64: 26, np.float32: 17}
+
+
+def _number(spec, key):
+    """Read a finite numeric field from a range spec."""
+    value = spec.get(key)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"Range '{key}' must be a number")
+    if not math.isfinite(value):
+        raise ValueError(f"Range '{key}' must be finite")
+    return float(value)
+
+
+class RangeSpec:
+    """
+    Lazily generated operand range.
+
+    Element i is start + i * step; for linspace ranges the last element is
+    exactly stop, matching numpy.linspace.
+
+    Attributes:
+        spec (dict): The JSON spec the range was parsed from
+    """
+
+    def __init__(self, start, step, length, stop=None, spec=None):
+        self.start = start
+        self.step = step
+        self.length = length
+        self.stop = stop
+        self.spec = spec
+
+    @classmethod
+    def from_json(cls, spec):
+        """
+        Parse a {"start","stop","step"} or {"linspace": {...}} range spec.
+
+        Raises:
+            ValueError: If the spec is malformed or describes an empty range
+        """
+        if 'linspace' in spec:
+            linspace = spec['linspace']
+            if not isinstance(linspace, dict):
+                raise ValueError("'linspace' must be an object with "
+                                 "'start', 'stop' and 'num'")
+            start = _number(linspace, 'start')
+            stop = _number(linspace, 'stop')
+            num = linspace.get('num')
+            if type(num) is not int or num < 1:
+                raise ValueError("Range 'num' must be a positive integer")
+            step = (stop - start) / (num - 1) if num > 1 else 0.0
+            if not math.isfinite(step):
+                raise ValueError("Range is too large")
+            return cls(start, step, num, stop=stop, spec=spec)
+
+        start = _number(spec, 'start')
+        stop = _number(spec, 'stop')
+        step = _number(spec, 'step')
+        if step == 0:
+            raise ValueError("Range 'step' must not be zero")
+        count = (stop - start) / step
+        if not math.isfinite(count):
+            raise ValueError("Range is too large")
+        length = math.ceil(count)
+        if length < 1:
+            raise ValueError("Range is empty")
+        return cls(start, step, length, spec=spec)
+
+    def __len__(self):
+        return self.length
+
+    def values(self, indices):
+        """Return the range elements at the given integer indices."""
+        values = self.start + indices * self.step
+        if self.stop is not None and self.length > 1:
+            values[indices == self.length - 1] = self.stop
+        return values
+
+
+def sweep_shape(a, b, grid):
+    """
+    Result shape of a sweep.
+
+    Args:
+        a (RangeSpec | float): First operand
+        b (RangeSpec | float | None): Second operand
+        grid (bool): Cartesian grid of a and b
+
+    Returns:
+        tuple: Result shape
+
+    Raises:
+        ValueError: If the operands cannot be combined
+    """
+    a_is_range = isinstance(a, RangeSpec)
+    b_is_range = isinstance(b, RangeSpec)
+    if grid:
+        if not (a_is_range and b_is_range):
+            raise ValueError("'grid' requires both 'a' and 'b' to be ranges")
+        return (len(a), len(b))
+    if a_is_range and b_is_range and len(a) != len(b):
+        raise ValueError(f"Ranges 'a' ({len(a)}) and 'b' ({len(b)}) must "
+                         "have the same length unless 'grid' is true")
+    return (len(a) if a_is_range else len(b),)
+
+
+def output_bytes(shape, output, precision):
+    """
+    Worst-case serialized size of a sweep's result data.
+
+    Args:
+        shape (tuple): Result shape (see sweep_shape)
+        output (str): One of SWEEP_OUTPUTS
+        precision (str): Precision tier
+
+    Returns:
+        int: Bytes the 'data' or 'values' field can take in the JSON
+             response; 0 for summary output, whose size is fixed
+    """
+    if output == SUMMARY:
+        return 0
+    size = math.prod(shape)
+    dtype = numpy_dtype(precision)
+    if output == BINARY:
+        # base64 turns every 3 bytes into 4 characters, plus the quotes
+        return 4 * math.ceil(size * np.dtype(dtype).itemsize / 3) + 2
+    # Nested lists add '[', ']' and ', ' per row of a grid
+    rows = shape[0] if len(shape) == 2 else 0
+    return size * VALUE_BYTES[dtype] + 4 * rows
+
+
+def _operands(a, b, grid, shape, start, stop):
+    """Generate the operands for flat result indices [start, stop)."""
+    indices = np.arange(start, stop, dtype=np.int64)
+    if grid:
+        columns = shape[1]
+        return a.values(indices // columns), b.values(indices % columns)
+    a_values = a.values(indices) if isinstance(a, RangeSpec) else a
+    b_values = b.values(indices) if isinstance(b, RangeSpec) else b
+    return a_values, b_values
+
+
+def run_sweep(model, operation, a, b, grid=False, output=SUMMARY,
+              precision='float64'):
+    """
+    Evaluate an operation over a range or grid.
+
+    Args:
+        model (MathCalculator): Model instance
+        operation (str): Operation name
+        a (RangeSpec | float): First operand
+        b (RangeSpec | float | None): Second operand
+        grid (bool): Cartesian grid of a and b
+        output (str): One of SWEEP_OUTPUTS
+        precision (str): Precision tier; float32 stores float32 results
+
+    Returns:
+        dict: 'shape', 'invalid' and the output-specific fields
+    """
+    shape = sweep_shape(a, b, grid)
+    total = math.prod(shape)
+    dtype = numpy_dtype(precision)
+
+    if output == SUMMARY:
+        count_invalid = 0
+        total_sum = 0.0
+        best_min = best_max = None
+        argmin = argmax = None
+        for start in range(0, total, CHUNK_SIZE):
+            stop = min(start + CHUNK_SIZE, total)
+            result, invalid = model.calculate_array(
+                operation, *_operands(a, b, grid, shape, start, stop),
+                dtype=dtype)
+            positions = np.arange(start, stop)
+            if invalid.any():
+                count_invalid += int(invalid.sum())
+                result, positions = result[~invalid], positions[~invalid]
+                if result.size == 0:
+                    continue
+            low, high = int(result.argmin()), int(result.argmax())
+            if best_min is None or result[low] < best_min:
+                best_min, argmin = float(result[low]), int(positions[low])
+            if best_max is None or result[high] > best_max:
+                best_max, argmax = float(result[high]), int(positions[high])
+            total_sum += float(result.sum(dtype=np.float64))
+
+        count_valid = total - count_invalid
+        return {
+            'shape': list(shape),
+            'invalid': count_invalid,
+            'count': total,
+            'min': best_min,
+            'max': best_max,
+            'mean': total_sum / count_valid if count_valid else None,
+            # Flat (row-major) indices into the result
+            'argmin': argmin,
+            'argmax': argmax,
+        }
+
+    result = np.empty(total, dtype=dtype)
+    count_invalid = 0
+    for start in range(0, total, CHUNK_SIZE):
+        stop = min(start + CHUNK_SIZE, total)
+        result[start:stop], invalid = model.calculate_array(
+            operation, *_operands(a, b, grid, shape, start, stop), dtype=dtype)
+        count_invalid += int(invalid.sum())
+
+    response = {'shape': list(shape), 'invalid': count_invalid}
+    if output == BINARY:
+        little_endian = result.astype(result.dtype.newbyteorder('<'), copy=False)
+        response['dtype'] = little_endian.dtype.str
+        response['data'] = base64.b64encode(little_endian.tobytes()).decode('ascii')
+    else:
+        if result.dtype == np.float32:
+            values = [shortest_float32(v) for v in result]
+        else:
+            values = result.tolist()
+        values = [None if math.isnan(v) else v for v in values]
+        if len(shape) == 2:
+            columns = shape[1]
+            values = [values[i:i + columns] for i in range(0, total, columns)]
+        response['values'] = values
+    return response
@@ -0,0 +1,317 @@
+"""
+Request Schema Validation for the Math Calculator Model
+
+This module validates inference requests before any computation happens.
+Each schema version is compiled once into a RequestValidator that holds
+flat lookup tables (operation -> arity, accepted numeric types), so the
+per-row work is a handful of dict/set lookups instead of exception-driven
+failures deep inside MathCalculator.
+
+Rejected rows raise ValidationError, which carries a structured error
+code alongside the human-readable message:
+
+    MISSING_PARAMETER      'operation' or 'a' (or 'b' for binary ops) missing
+    UNSUPPORTED_OPERATION  operation name is not in the schema
+    INVALID_TYPE           operand is not an int/float (strings, bools, ...)
+    ARITY_MISMATCH         'b' supplied to a unary operation
+    INVALID_PRECISION      'precision' is not one of the supported tiers
+    INVALID_RANGE          malformed range spec, mismatched ranges, or a
+                           sweep (or the sweeps of a batch) over the size
+                           or response limits (see sweep.py)
+    INVALID_OUTPUT         'output' is not a supported sweep output
+    INVALID_REQUEST        request row is not a JSON object
+"""
+
+import math
+from collections import namedtuple
+from functools import lru_cache
+
+from precision import DEFAULT_PRECISION, PRECISION_TIERS
+from sweep import (MAX_SWEEP_ELEMENTS, RESPONSE_BUDGET_BYTES, SUMMARY,
+                   SWEEP_OUTPUTS, RangeSpec, output_bytes, sweep_shape)
+
+# Error codes surfaced in the 'error_code' field of error responses
+MISSING_PARAMETER = 'MISSING_PARAMETER'
+UNSUPPORTED_OPERATION = 'UNSUPPORTED_OPERATION'
+INVALID_TYPE = 'INVALID_TYPE'
+ARITY_MISMATCH = 'ARITY_MISMATCH'
+INVALID_PRECISION = 'INVALID_PRECISION'
+INVALID_RANGE = 'INVALID_RANGE'
+INVALID_OUTPUT = 'INVALID_OUTPUT'
+INVALID_REQUEST = 'INVALID_REQUEST'
+CALCULATION_ERROR = 'CALCULATION_ERROR'
+
+DEFAULT_SCHEMA_VERSION = '1'
+
+# Operation arity per schema version
+SCHEMAS = {
+    '1': {
+        'add': 2,
+        'subtract': 2,
+        'multiply': 2,
+        'divide': 2,
+        'power': 2,
+        'sqrt': 1,
+        'sin': 1,
+        'cos': 1,
+        'tan': 1,
+        'log': 1,
+    },
+}
+
+# A request that passed validation
+ValidatedRequest = namedtuple('ValidatedRequest',
+                              ['operation', 'a', 'b', 'precision'])
+
+# A validated request whose 'a' and/or 'b' is a RangeSpec; output_bytes is
+# the worst-case size of its result data in the response
+SweepRequest = namedtuple('SweepRequest',
+                          ['operation', 'a', 'b', 'precision', 'grid',
+                           'output', 'shape', 'output_bytes'])
+
+# bool is a subclass of int, so operands are checked by exact type
+NUMERIC_TYPES = frozenset((int, float))
+
+
+class ValidationError(ValueError):
+    """
+    Raised when a request fails schema validation.
+
+    Attributes:
+        code (str): Structured error code (e.g. 'INVALID_TYPE')
+        operation (str | None): The request's operation, if it was valid
+    """
+
+    def __init__(self, code, message, operation=None):
+        super().__init__(message)
+        self.code = code
+        self.operation = operation
+
+
+class RequestValidator:
+    """
+    Validator compiled from a single schema version.
+
+    Use get_validator() rather than constructing this directly so that
+    each schema version is compiled only once per process.
+
+    Example:
+        validator = get_validator()
+        row = validator.validate({'operation': 'add', 'a': 1, 'b': 2})
+        # row == ValidatedRequest('add', 1, 2, 'float64')
+    """
+
+    def __init__(self, version):
+        """Compile the lookup tables for the given schema version."""
+        if version not in SCHEMAS:
+            raise ValueError(f"Unknown schema version: {version}. "
+                             f"Known versions: {list(SCHEMAS.keys())}")
+        self.version = version
+        self.arity = dict(SCHEMAS[version])
+        self.binary_operations = frozenset(
+            op for op, n in self.arity.items() if n == 2)
+        self.precision_tiers = frozenset(PRECISION_TIERS)
+        self._unsupported_suffix = (
+            f". Supported operations: {list(self.arity.keys())}")
+
+    def _operand(self, name, value):
+        """Check a single operand and coerce it to a plain int/float."""
+        if type(value) in NUMERIC_TYPES:
+            return value
+        # Accept numeric subclasses (e.g. numpy scalars) but never bool/str
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValidationError(
+                INVALID_TYPE,
+                f"Parameter '{name}' must be a number, "
+                f"got {type(value).__name__}")
+        return int(value) if isinstance(value, int) else float(value)
+
+    def _sweep_operand(self, name, value):
+        """Parse a range spec, or check a plain operand of a sweep."""
+        if type(value) is not dict:
+            value = self._operand(name, value)
+            # Plain operands are broadcast into float64 arrays
+            try:
+                float(value)
+            except OverflowError:
+                raise ValidationError(
+                    INVALID_RANGE,
+                    f"Parameter '{name}' is too large for a float64 sweep")
+            return value
+        try:
+            return RangeSpec.from_json(value)
+        except (ValueError, OverflowError) as e:
+            raise ValidationError(INVALID_RANGE, f"Parameter '{name}': {e}")
+
+    def _validate_sweep(self, request, operation, arity, a, b, precision):
+        """Validate a request with range operands (see sweep.py)."""
+        a = self._sweep_operand('a', a)
+        if arity == 2:
+            b = self._sweep_operand('b', b)
+
+        grid = request.get('grid', False)
+        if type(grid) is not bool:
+            raise ValidationError(INVALID_RANGE, "'grid' must be true or false")
+        output = request.get('output', SUMMARY)
+        if type(output) is not str or output not in SWEEP_OUTPUTS:
+            raise ValidationError(
+                INVALID_OUTPUT,
+                f"Unsupported output: {output}. "
+                f"Supported outputs: {list(SWEEP_OUTPUTS)}")
+
+        try:
+            shape = sweep_shape(a, b, grid)
+        except ValueError as e:
+            raise ValidationError(INVALID_RANGE, str(e))
+        except OverflowError:
+            # len() of a range longer than sys.maxsize
+            raise ValidationError(INVALID_RANGE, "Range is too large")
+        size = math.prod(shape)
+        if size > MAX_SWEEP_ELEMENTS:
+            raise ValidationError(
+                INVALID_RANGE,
+                f"Sweep of {size} elements exceeds the limit of "
+                f"{MAX_SWEEP_ELEMENTS}")
+        nbytes = output_bytes(shape, output, precision)
+        if nbytes > RESPONSE_BUDGET_BYTES:
+            raise ValidationError(
+                INVALID_RANGE,
+                f"Sweep of {size} elements could return {nbytes} bytes as "
+                f"'{output}' {precision} output, over the response budget "
+                f"of {RESPONSE_BUDGET_BYTES} bytes; use 'summary' output, "
+                "float32 'binary' output or a smaller range")
+
+        return SweepRequest(operation, a, b, precision, grid, output, shape,
+                            nbytes)
+
+    def validate(self, request):
+        """
+        Validate one request row.
+
+        Args:
+            request (dict): Request with 'operation', 'a', optional 'b' and
+                            optional 'precision'
+
+        Returns:
+            ValidatedRequest | SweepRequest: Operands coerced to int/float
+                (or parsed into RangeSpecs for sweeps), b set to None for
+                unary operations and precision defaulted
+
+        Raises:
+            ValidationError: If the request does not match the schema
+        """
+        if not isinstance(request, dict):
+            raise ValidationError(
+                INVALID_REQUEST,
+                f"Request must be a JSON object, got {type(request).__name__}")
+
+        operation = request.get('operation')
+        if operation is None:
+            raise ValidationError(
+                MISSING_PARAMETER, "Missing required parameter: 'operation'")
+        arity = self.arity.get(operation) if type(operation) is str else None
+        if arity is None:
+            raise ValidationError(
+                UNSUPPORTED_OPERATION,
+                f"Unsupported operation: {operation}{self._unsupported_suffix}")
+
+        try:
+            return self._validate_fields(request, operation, arity)
+        except ValidationError as e:
+            e.operation = operation
+            raise
+
+    def _validate_fields(self, request, operation, arity):
+        """Validate everything after a supported operation was found."""
+        a = request.get('a')
+        if a is None:
+            raise ValidationError(
+                MISSING_PARAMETER, "Missing required parameter: 'a'")
+
+        b = request.get('b')
+        if arity == 2:
+            if b is None:
+                raise ValidationError(
+                    MISSING_PARAMETER,
+                    f"Missing required parameter: 'b' for '{operation}'")
+        elif b is not None:
+            raise ValidationError(
+                ARITY_MISMATCH,
+                f"Operation '{operation}' takes a single operand; "
+                "unexpected parameter 'b'")
+
+        precision = request.get('precision', DEFAULT_PRECISION)
+        if type(precision) is not str or precision not in self.precision_tiers:
+            raise ValidationError(
+                INVALID_PRECISION,
+                f"Unsupported precision: {precision}. "
+                f"Supported precisions: {list(PRECISION_TIERS)}")
+
+        if type(a) is dict or type(b) is dict:
+            return self._validate_sweep(request, operation, arity, a, b,
+                                        precision)
+
+        a = self._operand('a', a)
+        if b is not None:
+            b = self._operand('b', b)
+        return ValidatedRequest(operation, a, b, precision)
+
+    def validate_batch(self, requests):
+        """
+        Validate a batch of request rows in a single pass.
+
+        Invalid rows do not stop the pass; they are reported in place so the
+        caller can skip them without running any computation. Sweep rows
+        share one response budget: a sweep whose output would take the
+        batch's total past RESPONSE_BUDGET_BYTES is rejected in place.
+
+        Args:
+            requests (list): List of request dicts
+
+        Returns:
+            list: One entry per row, either a validated request or the
+                  ValidationError raised for that row
+        """
+        validate = self.validate
+        rows = []
+        append = rows.append
+        budget = RESPONSE_BUDGET_BYTES
+        for request in requests:
+            try:
+                row = validate(request)
+            except ValidationError as e:
+                append(e)
+                continue
+            if type(row) is SweepRequest and row.output_bytes:
+                if row.output_bytes > budget:
+                    row = ValidationError(
+                        INVALID_RANGE,
+                        f"Sweep output of up to {row.output_bytes} bytes "
+                        f"exceeds the {budget} bytes left of the "
+                        f"{RESPONSE_BUDGET_BYTES}-byte response budget by "
+                        "earlier rows of this batch",
+                        operation=row.operation)
+                else:
+                    budget -= row.output_bytes
+            append(row)
+        return rows
+
+
+@lru_cache(maxsize=None)
+def get_validator(version=DEFAULT_SCHEMA_VERSION):
+    """
+    Return the compiled validator for a schema version.
+
+    Validators are compiled on first use and cached for the lifetime of
+    the process.
+
+    Args:
+        version (str): Schema version (defaults to DEFAULT_SCHEMA_VERSION)
+
+    Returns:
+        RequestValidator: Compiled validator
+
+    Raises:
+        ValueError: If the schema version is unknown
+    """
+    return RequestValidator(version)
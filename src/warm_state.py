@@ -0,0 +1,238 @@
+"""
+Persistent Warm-Start State
+
+State that would otherwise be rebuilt on every worker start is produced once
+at packaging time (deployment/deploy_model.py create_model_tar) and shipped
+in model.tar.gz next to the code. SageMaker extracts the archive into
+model_dir, where model_fn loads it:
+
+    warm_state/
+        manifest.json       format_version, schema versions, operation
+                            registry and an index of the files below
+        trig_degrees.npy    float64 (3, 360): sin, cos, tan at integer degrees
+        cache_snapshot.npy  optional result cache snapshot (SNAPSHOT_DTYPE)
+
+The .npy files are memory-mapped read-only, so every worker shares the same
+page-cache copy and loading costs no parsing. Loading compiles the request
+validators for the listed schema versions and, when the shared result cache
+is enabled, seeds it with the trig table and snapshot entries. The snapshot
+is only written when build_warm_state is given a cache to save.
+
+State is ignored (with a message on stderr) rather than failing model_fn
+when its format_version is unknown, its operation registry differs from
+this code, or any trig table entry differs from the scalar operations on
+this machine (the table may have been built elsewhere, e.g. with another
+libm); the endpoint then simply starts cold.
+"""
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from calculator_model import MathCalculator
+from shared_cache import A_INT, B_INT, HAS_B, OPERATION_CODES, OPERATION_NAMES
+from validation import SCHEMAS, get_validator
+
+FORMAT_VERSION = 1
+
+WARM_STATE_DIR = 'warm_state'
+MANIFEST_FILE = 'manifest.json'
+TRIG_FILE = 'trig_degrees.npy'
+SNAPSHOT_FILE = 'cache_snapshot.npy'
+
+TRIG_OPERATIONS = ('sin', 'cos', 'tan')
+TRIG_DEGREES = 360
+
+# One cached result per record, keyed like shared_cache slots
+SNAPSHOT_DTYPE = np.dtype([
+    ('op', 'u1'),
+    ('flags', 'u1'),
+    ('a', '<f8'),
+    ('b', '<f8'),
+    ('result', '<f8'),
+])
+
+
+def _record(operation, a, b, result):
+    """Snapshot record for one cache entry."""
+    flags = A_INT if type(a) is int else 0
+    if b is not None:
+        flags |= HAS_B | (B_INT if type(b) is int else 0)
+    return (OPERATION_CODES[operation], flags, a,
+            0.0 if b is None else b, result)
+
+
+def _trig_table():
+    """sin, cos and tan at integer degrees, as the scalar operations compute them."""
+    model = MathCalculator()
+    return np.array([[model.operations[op](degrees, None)
+                      for degrees in range(TRIG_DEGREES)]
+                     for op in TRIG_OPERATIONS], dtype='<f8')
+
+
+def build_warm_state(output_dir, schema_versions=None, cache=None):
+    """
+    Write the warm-start state to a directory.
+
+    Args:
+        output_dir (str): Directory to create (normally <root>/warm_state)
+        schema_versions (list, optional): Schema versions to pre-compile at
+                                          load time (defaults to all)
+        cache (SharedResultCache, optional): Cache whose entries are saved
+                                             as the snapshot
+
+    Returns:
+        dict: The manifest written
+    """
+    versions = sorted(SCHEMAS) if schema_versions is None else list(schema_versions)
+    unknown = [v for v in versions if v not in SCHEMAS]
+    if unknown:
+        raise ValueError(f"Unknown schema versions: {unknown}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    trig = _trig_table()
+    np.save(os.path.join(output_dir, TRIG_FILE), trig)
+
+    files = {
+        'trig_table': {
+            'path': TRIG_FILE,
+            'shape': list(trig.shape),
+            'dtype': trig.dtype.str,
+            'operations': list(TRIG_OPERATIONS),
+        },
+    }
+    if cache is not None:
+        snapshot = np.array([_record(*entry) for entry in cache.entries()],
+                            dtype=SNAPSHOT_DTYPE)
+        np.save(os.path.join(output_dir, SNAPSHOT_FILE), snapshot)
+        files['cache_snapshot'] = {'path': SNAPSHOT_FILE,
+                                   'entries': len(snapshot)}
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'schema_versions': versions,
+        'operations': {v: SCHEMAS[v] for v in versions},
+        'operation_codes': OPERATION_CODES,
+        'files': files,
+    }
+    with open(os.path.join(output_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+class WarmState:
+    """
+    Warm-start state loaded from model_dir.
+
+    Attributes:
+        manifest (dict): Parsed manifest.json
+        trig_table (numpy.memmap): (3, 360) sin/cos/tan at integer degrees
+        snapshot (numpy.memmap | None): Cache snapshot records
+    """
+
+    def __init__(self, manifest, trig_table, snapshot=None):
+        self.manifest = manifest
+        self.trig_table = trig_table
+        self.snapshot = snapshot
+
+    def seed(self, cache):
+        """
+        Insert the trig table and snapshot entries into a result cache.
+
+        Returns:
+            int: Number of entries written
+        """
+        written = 0
+        for row, operation in enumerate(TRIG_OPERATIONS):
+            for degrees, value in enumerate(self.trig_table[row].tolist()):
+                written += cache.put(operation, degrees, None, value)
+        if self.snapshot is not None:
+            for code, flags, a, b, result in self.snapshot.tolist():
+                a = int(a) if flags & A_INT else a
+                if flags & HAS_B:
+                    b = int(b) if flags & B_INT else b
+                else:
+                    b = None
+                written += cache.put(OPERATION_NAMES[code], a, b, result)
+        return written
+
+    def apply(self, model):
+        """
+        Warm a freshly created model.
+
+        Compiles the validators for the manifest's schema versions, seeds
+        the model's shared result cache if it has one, and attaches this
+        state as model.warm_state.
+        """
+        for version in self.manifest['schema_versions']:
+            get_validator(version)
+        cache = getattr(model, 'result_cache', None)
+        if cache is not None:
+            self.seed(cache)
+        model.warm_state = self
+
+
+def _load(path):
+    """Load and check the state in path; raises ValueError if unusable."""
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+
+    version = manifest.get('format_version')
+    if version != FORMAT_VERSION:
+        raise ValueError(f"format_version {version} is not supported "
+                         f"(expected {FORMAT_VERSION})")
+    for schema_version, arity in manifest['operations'].items():
+        if SCHEMAS.get(schema_version) != arity:
+            raise ValueError(f"operation registry for schema version "
+                             f"{schema_version} does not match this code")
+    if manifest['operation_codes'] != OPERATION_CODES:
+        raise ValueError("operation codes do not match this code")
+
+    files = manifest['files']
+    trig = np.load(os.path.join(path, files['trig_table']['path']),
+                   mmap_mode='r')
+    if trig.shape != (len(TRIG_OPERATIONS), TRIG_DEGREES):
+        raise ValueError(f"trig table has shape {trig.shape}")
+    # Every entry must be bit-identical to what this machine computes
+    expected = _trig_table()
+    mismatched = np.argwhere(trig.view('<u8') != expected.view('<u8'))
+    if len(mismatched):
+        row, degrees = mismatched[0].tolist()
+        raise ValueError(f"trig table does not match "
+                         f"{TRIG_OPERATIONS[row]}({degrees}) on this platform "
+                         f"({len(mismatched)} entries differ)")
+
+    snapshot = None
+    if 'cache_snapshot' in files:
+        snapshot = np.load(os.path.join(path, files['cache_snapshot']['path']),
+                           mmap_mode='r')
+        if snapshot.dtype != SNAPSHOT_DTYPE:
+            raise ValueError(f"cache snapshot has dtype {snapshot.dtype}")
+    return WarmState(manifest, trig, snapshot)
+
+
+def load_warm_state(model_dir):
+    """
+    Load the warm-start state packaged under model_dir, if any.
+
+    Args:
+        model_dir (str | None): Directory the model archive was extracted to
+
+    Returns:
+        WarmState | None: The state, or None if there is none or it cannot
+                          be used
+    """
+    if model_dir is None:
+        return None
+    path = os.path.join(model_dir, WARM_STATE_DIR)
+    if not os.path.exists(os.path.join(path, MANIFEST_FILE)):
+        return None
+    try:
+        return _load(path)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Ignoring warm-start state in {path}: {e}", file=sys.stderr)
+        return None
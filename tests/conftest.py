@@ -0,0 +1,11 @@
+"""
+Shared pytest configuration.
+
+Metrics are disabled before any test imports the inference handler, so
+the default stdout EMF recorder does not write records during the run.
+Tests that check metrics inject a recorder with a capturing sink.
+"""
+
+import os
+
+os.environ['CALCULATOR_METRICS_ENABLED'] = '0'
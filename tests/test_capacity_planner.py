@@ -0,0 +1,179 @@
+"""
+Pytest unit tests for the capacity planner (deployment/capacity_planner.py).
+
+Application Auto Scaling is replaced by a stub client that records calls.
+"""
+
+import json
+import math
+import sys
+from pathlib import Path
+import pytest
+
+# --- Path setup to find the 'deployment' directory ---
+DEPLOYMENT_DIR = Path(__file__).resolve().parent.parent / "deployment"
+sys.path.insert(0, str(DEPLOYMENT_DIR))
+
+from capacity_planner import (MAX_SUSTAINED_UTILIZATION, PREDEFINED_METRIC,
+                              SCALABLE_DIMENSION, TARGET_UTILIZATION,
+                              benchmark, build_workload, parse_mix,
+                              percentile, plan_capacity,
+                              register_scaling_policy, simulate_p99,
+                              sustainable_throughput)
+
+
+class StubAutoScalingClient:
+    """Records Application Auto Scaling calls instead of making them."""
+
+    def __init__(self):
+        self.calls = []
+
+    def register_scalable_target(self, **kwargs):
+        self.calls.append(('register_scalable_target', kwargs))
+        return {}
+
+    def put_scaling_policy(self, **kwargs):
+        self.calls.append(('put_scaling_policy', kwargs))
+        return {'PolicyARN': 'arn:aws:autoscaling:stub'}
+
+
+# Service times of 1-3 ms (mean 2 ms), as benchmark() reports them
+SERVICE_TIMES_MS = sorted([1.0] * 30 + [2.0] * 40 + [3.0] * 30)
+BENCHMARK = {'endpoint_name': 'calc-endpoint', 'p99_ms': 3.0,
+             'service_times_ms': SERVICE_TIMES_MS}
+
+
+class StubRuntimeClient:
+    """Answers invoke_endpoint calls locally."""
+
+    class _Body:
+        def read(self):
+            return b'{}'
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke_endpoint(self, **kwargs):
+        self.calls += 1
+        return {'Body': self._Body()}
+
+
+def test_build_workload_follows_mix():
+    """Tests that request bodies only use operations from the mix."""
+    bodies = build_workload({'add': 1, 'sqrt': 1}, 200, seed=1)
+    operations = {json.loads(body)['operation'] for body in bodies}
+    assert operations == {'add', 'sqrt'}
+    assert 'b' not in next(json.loads(b) for b in bodies
+                           if json.loads(b)['operation'] == 'sqrt')
+
+def test_build_workload_batches():
+    """Tests that rows_per_request > 1 builds JSON arrays."""
+    body = build_workload({'sin': 1}, 1, rows_per_request=5)[0]
+    assert len(json.loads(body)) == 5
+
+def test_build_workload_rejects_unknown_operation():
+    """Tests that unsupported operations in the mix are rejected."""
+    with pytest.raises(ValueError, match="Unsupported operations"):
+        build_workload({'invent': 1}, 1)
+
+def test_percentile():
+    """Tests the nearest-rank percentile."""
+    values = list(range(1, 101))
+    assert percentile(values, 0.99) == 99
+    assert percentile(values, 0.50) == 50
+
+def test_benchmark_measures_local_worker():
+    """Tests that the benchmark times requests through a local HTTP worker."""
+    result = benchmark(parse_mix(['add=0.5', 'sin=0.5']), num_requests=200,
+                       warmup=10)
+    assert result['requests'] == 200
+    assert result['requests_per_second'] > 0
+    assert 0 < result['p50_ms'] <= result['p99_ms'] <= result['max_ms']
+    assert len(result['service_times_ms']) == 200
+    assert result['endpoint_name'] is None
+
+def test_benchmark_endpoint_with_stub_client():
+    """Tests that an endpoint benchmark goes through invoke_endpoint."""
+    client = StubRuntimeClient()
+    result = benchmark({'add': 1}, num_requests=20, warmup=5,
+                       endpoint_name='calc-endpoint', client=client)
+    assert client.calls == 25
+    assert len(result['service_times_ms']) == 20
+    assert result['endpoint_name'] == 'calc-endpoint'
+
+def test_simulated_p99_grows_with_load():
+    """Tests that queueing delay raises p99 as the offered load grows."""
+    idle = simulate_p99(SERVICE_TIMES_MS, 4, 10, num_requests=5000)
+    busy = simulate_p99(SERVICE_TIMES_MS, 4, 1900, num_requests=5000)
+    assert idle == 3.0
+    assert busy > idle
+
+def test_sustainable_throughput_follows_p99_target():
+    """Tests that a tighter p99 budget lowers the sustainable rate."""
+    saturation = 4 * 1000.0 / 2.0
+    loose = sustainable_throughput(SERVICE_TIMES_MS, 4, 100, num_requests=5000)
+    tight = sustainable_throughput(SERVICE_TIMES_MS, 4, 4, num_requests=5000)
+    assert loose == MAX_SUSTAINED_UTILIZATION * saturation
+    assert 0 < tight < loose
+    assert sustainable_throughput(SERVICE_TIMES_MS, 4, 2.5) == 0.0
+
+def test_plan_capacity():
+    """Tests instance count and target value from the p99-limited rate."""
+    plan = plan_capacity(BENCHMARK, target_rps=5000, target_p99_ms=100,
+                         instance_type='ml.c5.xlarge')
+    # 4 workers / 2 ms = 2000 rps; 90% sustained, 70% of that planned
+    assert plan['instance_capacity_rps'] == 2000
+    assert plan['p99_limited_rps'] == 1800
+    assert plan['initial_instance_count'] == 4
+    assert plan['max_capacity'] == 8
+    assert plan['target_invocations_per_instance'] == math.floor(
+        1800 * TARGET_UTILIZATION * 60)
+    assert plan['expected_p99_ms'] <= 100
+
+def test_plan_capacity_p99_limits_instances():
+    """Tests that the p99 target, not just throughput, sets the count."""
+    loose = plan_capacity(BENCHMARK, 5000, 100, 'ml.c5.xlarge')
+    tight = plan_capacity(BENCHMARK, 5000, 4, 'ml.c5.xlarge')
+    assert tight['initial_instance_count'] > loose['initial_instance_count']
+    assert (tight['target_invocations_per_instance']
+            < loose['target_invocations_per_instance'])
+
+def test_plan_capacity_p99_unreachable():
+    """Tests that a p99 target below the service time is rejected."""
+    with pytest.raises(ValueError, match="more instances will not help"):
+        plan_capacity(BENCHMARK, target_rps=10, target_p99_ms=1)
+
+def test_plan_capacity_unknown_instance_type():
+    """Tests that unknown instance types are rejected."""
+    with pytest.raises(ValueError, match="Unknown instance type"):
+        plan_capacity(BENCHMARK, 10, 10, instance_type='ml.x99.huge')
+
+def test_register_scaling_policy_with_stub_client():
+    """Tests the Application Auto Scaling calls for a plan."""
+    plan = plan_capacity(BENCHMARK, 5000, 100, 'ml.c5.xlarge', max_capacity=6)
+    client = StubAutoScalingClient()
+    response = register_scaling_policy('calc-endpoint', plan, client=client)
+
+    assert response['PolicyARN'] == 'arn:aws:autoscaling:stub'
+    (register_name, target), (policy_name, policy) = client.calls
+    assert register_name == 'register_scalable_target'
+    assert target['ResourceId'] == 'endpoint/calc-endpoint/variant/AllTraffic'
+    assert target['ScalableDimension'] == SCALABLE_DIMENSION
+    assert (target['MinCapacity'], target['MaxCapacity']) == (4, 6)
+
+    assert policy_name == 'put_scaling_policy'
+    assert policy['PolicyType'] == 'TargetTrackingScaling'
+    config = policy['TargetTrackingScalingPolicyConfiguration']
+    assert config['TargetValue'] == float(plan['target_invocations_per_instance'])
+    assert config['PredefinedMetricSpecification']['PredefinedMetricType'] == PREDEFINED_METRIC
+
+
+def test_register_rejects_local_measurement():
+    """Tests that a plan from a local worker cannot be registered."""
+    local = dict(BENCHMARK, endpoint_name=None)
+    plan = plan_capacity(local, 5000, 100, 'ml.c5.xlarge')
+    assert plan['measured_endpoint'] is None
+    client = StubAutoScalingClient()
+    with pytest.raises(ValueError, match="--measure-endpoint"):
+        register_scaling_policy('calc-endpoint', plan, client=client)
+    assert client.calls == []
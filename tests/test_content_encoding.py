@@ -0,0 +1,98 @@
+"""
+Pytest unit tests for compressed request and response bodies
+(src/content_encoding.py and its use in src/inference.py).
+"""
+
+import gzip
+import json
+import sys
+from pathlib import Path
+import pytest
+
+# --- Path setup to find the 'src' directory ---
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+import content_encoding
+from content_encoding import (COMPRESSION_MIN_BYTES, parse_media_type,
+                              zstd_available)
+from inference import input_fn, output_fn
+
+ROWS = [{'operation': 'add', 'a': i, 'b': 1} for i in range(200)]
+JSONLINES_BODY = '\n'.join(json.dumps(row) for row in ROWS).encode('utf-8')
+
+requires_zstd = pytest.mark.skipif(not zstd_available(),
+                                   reason="zstandard is not installed")
+
+
+def test_parse_media_type():
+    """Tests splitting a content type into media type and parameters."""
+    assert parse_media_type('Application/JSON; encoding="GZIP"') == (
+        'application/json', {'encoding': 'gzip'})
+    assert parse_media_type('application/jsonlines') == ('application/jsonlines', {})
+
+def test_input_fn_gzip_declared():
+    """Tests a gzip JSON body declared through the content type."""
+    body = gzip.compress(json.dumps(ROWS).encode('utf-8'))
+    assert input_fn(body, 'application/json; encoding=gzip') == ROWS
+
+def test_input_fn_gzip_detected_from_magic_bytes():
+    """Tests that a gzip JSON Lines body is recognised without a parameter."""
+    assert input_fn(gzip.compress(JSONLINES_BODY), 'application/jsonlines') == ROWS
+
+@requires_zstd
+def test_input_fn_zstd():
+    """Tests a zstd JSON Lines body."""
+    body = content_encoding.encode_body(JSONLINES_BODY.decode('utf-8'), 'zstd')
+    assert input_fn(body, 'application/jsonlines; encoding=zstd') == ROWS
+
+def test_input_fn_zstd_unavailable(monkeypatch):
+    """Tests the error when zstd is requested but not installed."""
+    monkeypatch.setattr(content_encoding, 'zstandard', None)
+    monkeypatch.setattr(content_encoding, 'stdlib_zstd', None)
+    with pytest.raises(ValueError, match="requires the 'zstandard' package"):
+        input_fn(b'\x28\xb5\x2f\xfd rest', 'application/json')
+
+def test_input_fn_corrupt_gzip():
+    """Tests that a truncated gzip body is reported as a ValueError."""
+    body = gzip.compress(JSONLINES_BODY)[:-20]
+    with pytest.raises(ValueError, match="Invalid gzip request body"):
+        input_fn(body, 'application/jsonlines')
+
+def test_input_fn_unsupported_encoding():
+    """Tests an unknown declared encoding."""
+    with pytest.raises(ValueError, match="Unsupported content encoding"):
+        input_fn(b'{}', 'application/json; encoding=brotli')
+
+def test_input_fn_decompressed_size_limit(monkeypatch):
+    """Tests that oversized decompressed bodies are rejected."""
+    monkeypatch.setattr(content_encoding, 'MAX_DECOMPRESSED_BYTES', 1024)
+    with pytest.raises(ValueError, match="Decompressed request body exceeds"):
+        input_fn(gzip.compress(JSONLINES_BODY), 'application/jsonlines')
+
+def test_output_fn_compresses_large_responses():
+    """Tests that large responses are gzip compressed on request."""
+    body, content_type = output_fn(ROWS, 'application/json; encoding=gzip')
+    assert content_type == 'application/json; encoding=gzip'
+    assert json.loads(gzip.decompress(body)) == ROWS
+    assert len(body) < len(json.dumps(ROWS))
+
+def test_output_fn_skips_small_responses():
+    """Tests that responses under the threshold are sent uncompressed."""
+    prediction = {'status': 'success', 'result': 42}
+    assert len(json.dumps(prediction)) < COMPRESSION_MIN_BYTES
+    body, content_type = output_fn(prediction, 'application/json; encoding=gzip')
+    assert content_type == 'application/json'
+    assert body == json.dumps(prediction)
+
+def test_output_fn_encoding_preference_list(monkeypatch):
+    """Tests falling back to gzip when zstd is preferred but unavailable."""
+    monkeypatch.setattr(content_encoding, 'zstandard', None)
+    monkeypatch.setattr(content_encoding, 'stdlib_zstd', None)
+    _, content_type = output_fn(ROWS, 'application/jsonlines; encoding="zstd,gzip"')
+    assert content_type == 'application/jsonlines; encoding=gzip'
+
+def test_output_fn_unsupported_encoding():
+    """Tests an accept encoding the handler cannot produce."""
+    with pytest.raises(ValueError, match="Unsupported accept encoding"):
+        output_fn(ROWS, 'application/json; encoding=brotli')
@@ -52,6 +52,14 @@ def test_input_fn_invalid_content_type():
     with pytest.raises(ValueError, match="Unsupported content type"):
         input_fn("some data", "text/plain")
 
+def test_input_fn_jsonlines():
+    """Tests input_fn with a JSON Lines body (Batch Transform MultiRecord)."""
+    request_body = b'{"operation": "add", "a": 1, "b": 2}\n\n{"operation": "sqrt", "a": 4}\n'
+    assert input_fn(request_body, 'application/jsonlines') == [
+        {"operation": "add", "a": 1, "b": 2},
+        {"operation": "sqrt", "a": 4},
+    ]
+
 def test_input_fn_invalid_json():
     """Tests input_fn with malformed JSON."""
     with pytest.raises(ValueError, match="Invalid JSON format"):
@@ -83,6 +91,31 @@ def test_predict_fn_error_cases(model, payload, error_message_part):
     assert prediction['status'] == 'error'
     assert error_message_part in prediction['error']
 
+@pytest.mark.parametrize("payload, error_code", [
+    ({'operation': 'add', 'a': '10', 'b': 5}, 'INVALID_TYPE'),
+    ({'operation': 'add', 'a': 10}, 'MISSING_PARAMETER'),
+    ({'operation': 'sqrt', 'a': 16, 'b': 4}, 'ARITY_MISMATCH'),
+    ({'operation': 'divide', 'a': 1, 'b': 0}, 'CALCULATION_ERROR'),
+    ({'operation': 'power', 'a': -8, 'b': 0.5}, 'CALCULATION_ERROR'),
+])
+def test_predict_fn_error_codes(model, payload, error_code):
+    """Tests predict_fn reports a structured error code for rejected rows."""
+    prediction = predict_fn(payload, model)
+    assert prediction['status'] == 'error'
+    assert prediction['error_code'] == error_code
+
+def test_predict_fn_batch(model):
+    """Tests predict_fn with a list of requests returns one result per row."""
+    predictions = predict_fn([
+        {'operation': 'add', 'a': 1, 'b': 2},
+        {'operation': 'add', 'a': '1', 'b': 2},
+        {'operation': 'sqrt', 'a': 9},
+    ], model)
+    assert [p['status'] for p in predictions] == ['success', 'error', 'success']
+    assert predictions[0]['result'] == 3.0
+    assert predictions[1]['error_code'] == 'INVALID_TYPE'
+    assert predictions[2]['result'] == 3.0
+
 
 # --- Tests for output_fn ---
 
@@ -98,6 +131,13 @@ def test_output_fn_success():
     assert returned_accept == accept
     assert body == expected_body
 
+def test_output_fn_jsonlines():
+    """Tests output_fn writes one JSON object per line for JSON Lines."""
+    predictions = [{'status': 'success', 'result': 1}, {'status': 'error'}]
+    body, returned_accept = output_fn(predictions, 'application/jsonlines')
+    assert returned_accept == 'application/jsonlines'
+    assert [json.loads(line) for line in body.splitlines()] == predictions
+
 def test_output_fn_invalid_accept_type():
     """Tests output_fn with an unsupported accept type."""
     with pytest.raises(ValueError, match="Unsupported accept type"):
@@ -0,0 +1,103 @@
+"""
+Pytest unit tests for the local Batch Transform emulator
+(deployment/local_batch_transform.py).
+"""
+
+import json
+import sys
+from pathlib import Path
+import pytest
+
+# --- Path setup to find the 'deployment' directory ---
+DEPLOYMENT_DIR = Path(__file__).resolve().parent.parent / "deployment"
+sys.path.insert(0, str(DEPLOYMENT_DIR))
+
+from local_batch_transform import (MB, build_payloads, recommend,
+                                   run_transform, split_records, sweep)
+
+
+@pytest.fixture
+def input_dir(tmp_path):
+    """Input directory with two JSON Lines files, one containing an error."""
+    directory = tmp_path / "input"
+    directory.mkdir()
+    rows = [json.dumps({'operation': 'add', 'a': i, 'b': 1}) for i in range(50)]
+    (directory / "part-0.jsonl").write_text('\n'.join(rows) + '\n')
+    (directory / "part-1.jsonl").write_text(
+        json.dumps({'operation': 'sqrt', 'a': 16}) + '\n\n'
+        + json.dumps({'operation': 'divide', 'a': 1, 'b': 0}) + '\n')
+    return directory
+
+
+def test_split_records_skips_blank_lines(input_dir):
+    """Tests that files are split into non-empty line records."""
+    assert len(split_records(input_dir / "part-1.jsonl")) == 2
+
+def test_build_payloads_single_record():
+    """Tests that SingleRecord sends one record per request."""
+    assert build_payloads([b'a', b'b'], 'SingleRecord', 1) == [b'a', b'b']
+
+def test_build_payloads_multi_record_respects_limit():
+    """Tests that MultiRecord packs records up to MaxPayloadInMB."""
+    record = b'x' * (MB // 2 - 1)
+    payloads = build_payloads([record] * 5, 'MultiRecord', 1)
+    assert len(payloads) == 3
+    assert all(len(p) <= MB for p in payloads)
+    assert payloads[0] == record + b'\n' + record
+
+def test_build_payloads_record_too_large():
+    """Tests that a record larger than the payload limit fails the job."""
+    with pytest.raises(ValueError, match="exceeds MaxPayloadInMB"):
+        build_payloads([b'x' * (MB + 1)], 'MultiRecord', 1)
+
+def test_run_transform_assembles_output(input_dir, tmp_path):
+    """Tests that outputs are assembled per line into <file>.out."""
+    output_dir = tmp_path / "output"
+    stats = run_transform(input_dir, 'MultiRecord', 1, 2, output_dir=output_dir)
+
+    assert stats['records'] == 52
+    assert stats['requests'] == 2
+    assert stats['errors'] == 1
+    assert stats['peak_memory_mb'] >= stats['peak_worker_memory_mb'] > 0
+
+    lines = (output_dir / "part-0.jsonl.out").read_text().splitlines()
+    assert [json.loads(line)['result'] for line in lines] == [i + 1.0 for i in range(50)]
+    errors = (output_dir / "part-1.jsonl.out").read_text().splitlines()
+    assert json.loads(errors[1])['error_code'] == 'CALCULATION_ERROR'
+
+def test_single_and_multi_record_outputs_match(input_dir, tmp_path):
+    """Tests that both batch strategies produce identical assembled output."""
+    run_transform(input_dir, 'SingleRecord', 1, 1, output_dir=tmp_path / "single")
+    run_transform(input_dir, 'MultiRecord', 1, 1, output_dir=tmp_path / "multi")
+    for name in ("part-0.jsonl.out", "part-1.jsonl.out"):
+        assert ((tmp_path / "single" / name).read_text()
+                == (tmp_path / "multi" / name).read_text())
+
+def test_run_transform_rejects_invalid_limits(input_dir):
+    """Tests SageMaker's MaxPayloadInMB * MaxConcurrentTransforms limit."""
+    with pytest.raises(ValueError, match="must not exceed"):
+        run_transform(input_dir, 'MultiRecord', 50, 4)
+
+def test_sweep_and_recommend(input_dir):
+    """Tests that a sweep yields a valid CreateTransformJob configuration."""
+    results = sweep(input_dir, payload_sizes_mb=(1, 6), concurrency=(1, 2))
+    assert len(results) == 6  # SingleRecord x 2 workers + MultiRecord x 4
+
+    recommendation = recommend(results)
+    assert recommendation['BatchStrategy'] in ('SingleRecord', 'MultiRecord')
+    assert recommendation['SplitType'] == 'Line'
+    assert recommendation['stats'] in results
+
+def test_recommend_memory_limit():
+    """Tests that configurations over the memory budget are excluded."""
+    results = [
+        {'batch_strategy': 'MultiRecord', 'max_payload_mb': 6,
+         'max_concurrent_transforms': 4, 'records_per_second': 1000.0,
+         'peak_memory_mb': 900.0},
+        {'batch_strategy': 'MultiRecord', 'max_payload_mb': 1,
+         'max_concurrent_transforms': 2, 'records_per_second': 500.0,
+         'peak_memory_mb': 100.0},
+    ]
+    assert recommend(results, memory_limit_mb=512)['MaxPayloadInMB'] == 1
+    with pytest.raises(ValueError, match="memory limit"):
+        recommend(results, memory_limit_mb=10)
@@ -0,0 +1,136 @@
+"""
+Pytest unit tests for the EMF metrics recorder (src/metrics.py).
+
+Records are captured locally by passing a list's append method as the sink.
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+import pytest
+
+# --- Path setup to find the 'src' directory ---
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+import inference
+from metrics import MetricsRecorder, MAX_VALUES_PER_RECORD
+
+
+@pytest.fixture
+def captured():
+    """Recorder whose EMF records are captured into a list."""
+    records = []
+    recorder = MetricsRecorder(flush_interval=3600, sink=records.append)
+    yield recorder, records
+    recorder.close()
+
+
+def _by_dimensions(records):
+    """Parse records and index them by their dimension set."""
+    parsed = {}
+    for line in records:
+        record = json.loads(line)
+        names = record['_aws']['CloudWatchMetrics'][0]['Dimensions'][0]
+        parsed.setdefault(tuple(record[name] for name in names), []).append(record)
+    return parsed
+
+
+def test_flush_emits_emf_records(captured):
+    """Tests that counts, latencies and errors are aggregated per dimension."""
+    recorder, records = captured
+    recorder.record('add', 0.5)
+    recorder.record('add', 1.5)
+    recorder.record('divide', 0.25, 'CALCULATION_ERROR')
+
+    assert recorder.flush() == 3
+    parsed = _by_dimensions(records)
+
+    add = parsed[('add',)][0]
+    assert add['Requests'] == 2
+    assert add['Latency'] == [0.5, 1.5]
+    assert add['_aws']['CloudWatchMetrics'][0]['Namespace'] == 'SageMakerCalculator'
+    assert parsed[('divide',)][0]['Requests'] == 1
+    assert parsed[('divide', 'CALCULATION_ERROR')][0]['Errors'] == 1
+
+def test_flush_with_nothing_buffered(captured):
+    """Tests that an empty flush emits no records."""
+    recorder, records = captured
+    assert recorder.flush() == 0
+    assert records == []
+
+def test_latency_values_are_chunked(captured):
+    """Tests that latency arrays respect the EMF per-record value limit."""
+    recorder, records = captured
+    for _ in range(MAX_VALUES_PER_RECORD + 1):
+        recorder.record('sin', 1.0)
+    recorder.flush()
+
+    sin_records = _by_dimensions(records)[('sin',)]
+    assert len(sin_records) == 2
+    assert sin_records[0]['Requests'] == MAX_VALUES_PER_RECORD + 1
+    assert 'Requests' not in sin_records[1]
+    assert len(sin_records[1]['Latency']) == 1
+
+def test_size_threshold_triggers_background_flush():
+    """Tests that filling the buffer wakes the background thread."""
+    records = []
+    recorder = MetricsRecorder(flush_interval=3600, max_buffered=2,
+                               sink=records.append)
+    recorder.record('add', 1.0)
+    recorder.record('add', 1.0)
+    deadline = time.monotonic() + 5
+    while not records and time.monotonic() < deadline:
+        time.sleep(0.01)
+    recorder.close()
+    assert _by_dimensions(records)[('add',)][0]['Requests'] == 2
+
+def test_sampling_keeps_counts_exact():
+    """Tests that sampling drops latency samples but not request counts."""
+    records = []
+    recorder = MetricsRecorder(flush_interval=3600, sample_rate=0.01,
+                               sink=records.append)
+    for _ in range(50):
+        recorder.record('cos', 1.0)
+    recorder.close()
+    cos = _by_dimensions(records)[('cos',)]
+    assert cos[0]['Requests'] == 50
+    assert sum(len(r.get('Latency', [])) for r in cos) < 50
+
+def test_invalid_sample_rate():
+    """Tests that a sample rate outside (0, 1] is rejected."""
+    with pytest.raises(ValueError, match="sample_rate"):
+        MetricsRecorder(sample_rate=0)
+
+def test_predict_fn_records_metrics(monkeypatch, captured):
+    """Tests that predict_fn records per-operation and per-error-code metrics."""
+    recorder, records = captured
+    monkeypatch.setattr(inference, 'METRICS', recorder)
+    model = inference.model_fn(model_dir=None)
+
+    inference.predict_fn({'operation': 'add', 'a': 1, 'b': 2}, model)
+    inference.predict_fn({'operation': 'divide', 'a': 1, 'b': 0}, model)
+    inference.predict_fn({'operation': 'add', 'a': 'x', 'b': 2}, model)
+    inference.predict_fn({'operation': 'modulo', 'a': 1, 'b': 2}, model)
+    recorder.flush()
+
+    parsed = _by_dimensions(records)
+    # The rejected 'add' row is counted under its operation...
+    assert parsed[('add',)][0]['Requests'] == 2
+    assert parsed[('add', 'INVALID_TYPE')][0]['Errors'] == 1
+    # ...but adds no latency sample
+    assert len(parsed[('add',)][0]['Latency']) == 1
+    assert parsed[('divide', 'CALCULATION_ERROR')][0]['Errors'] == 1
+    assert parsed[('invalid', 'UNSUPPORTED_OPERATION')][0]['Errors'] == 1
+    assert 'Latency' not in parsed[('invalid',)][0]
+
+
+def test_record_without_latency(captured):
+    """Tests that a None latency counts the request without a sample."""
+    recorder, records = captured
+    recorder.record('sqrt', None, 'INVALID_TYPE')
+    recorder.flush()
+    parsed = _by_dimensions(records)
+    assert parsed[('sqrt',)][0]['Requests'] == 1
+    assert 'Latency' not in parsed[('sqrt',)][0]
@@ -0,0 +1,140 @@
+"""
+Pytest unit tests for the precision tiers (src/precision.py).
+
+Each tier is checked against the scalar float64 reference computed by
+MathCalculator.calculate, using the error bounds documented in precision.py.
+"""
+
+import sys
+import time
+from fractions import Fraction
+from pathlib import Path
+import pytest
+
+# --- Path setup to find the 'src' directory ---
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+import numpy as np
+
+from calculator_model import MathCalculator
+from inference import predict_fn
+from precision import (EXACT_MAX_BITS, FLOAT32_MIN_NORMAL,
+                       FLOAT32_RELATIVE_ERROR, FLOAT64_RELATIVE_ERROR,
+                       MAX_EXACT_FLOAT_INT, apply_precision,
+                       exceeds_exact_limit, float64_exact)
+
+CASES = [
+    ('add', 0.1, 0.2), ('subtract', 1e10, 3.3), ('multiply', 1.1, 3.7),
+    ('divide', 1, 3), ('divide', 2, 7e-20), ('power', 1.0001, 1000),
+    ('power', 2, 0.5), ('sqrt', 2, None), ('sqrt', 1e-30, None),
+    ('sin', 30, None), ('cos', 123.456, None), ('tan', 89.9, None),
+    ('log', 1e-12, None), ('log', 12345.678, None),
+]
+
+
+@pytest.fixture(scope="module")
+def calc():
+    return MathCalculator()
+
+
+@pytest.mark.parametrize("operation, a, b", CASES)
+def test_float64_matches_scalar_reference(calc, operation, a, b):
+    """Tests that float64 is identical to the scalar reference."""
+    reference = float(calc.calculate(operation, a, b))
+    assert apply_precision(calc.calculate(operation, a, b), operation, 'float64') == reference
+
+@pytest.mark.parametrize("operation, a, b", CASES)
+def test_float32_within_documented_bound(calc, operation, a, b):
+    """Tests the float32 tier's relative error bound versus float64."""
+    reference = float(calc.calculate(operation, a, b))
+    result = apply_precision(calc.calculate(operation, a, b), operation, 'float32')
+    assert abs(result - reference) <= FLOAT32_RELATIVE_ERROR * abs(reference)
+    # The serialized value must round-trip to the same float32
+    assert np.float32(result) == np.float32(reference)
+
+def test_float32_shortens_serialized_result():
+    """Tests that float32 results serialize with fewer digits."""
+    assert repr(apply_precision(1 / 3, 'divide', 'float32')) == '0.33333334'
+    assert len(repr(apply_precision(1 / 3, 'divide', 'float64'))) > 10
+
+def test_float32_subnormal_absolute_bound():
+    """Tests the absolute error bound below the float32 normal range."""
+    value = FLOAT32_MIN_NORMAL / 3
+    assert abs(apply_precision(value, 'divide', 'float32') - value) <= 2.0 ** -149
+
+def test_float32_overflow():
+    """Tests that results beyond float32 range fail instead of returning inf."""
+    with pytest.raises(OverflowError, match="float32"):
+        apply_precision(1e39, 'multiply', 'float32')
+
+@pytest.mark.parametrize("operation, a, b, expected", [
+    ('add', 2 ** 60, 1, 1152921504606846977),
+    ('subtract', 10 ** 20, 1, 99999999999999999999),
+    ('multiply', 123456789123, 987654321987, 121932631355968601347401),
+    ('power', 3, 100, 515377520732011331036461129765621272702107522001),
+])
+def test_exact_integer_results(calc, operation, a, b, expected):
+    """Tests that exact integer results have zero error."""
+    result = apply_precision(calc.calculate(operation, a, b), operation, 'exact')
+    assert type(result) is int
+    assert result == expected
+
+def test_float64_bound_on_integer_results(calc):
+    """Tests float64's documented bound on a result the exact tier keeps."""
+    exact = calc.calculate('power', 3, 100)
+    result = apply_precision(exact, 'power', 'float64')
+    assert abs(Fraction(result) - exact) <= FLOAT64_RELATIVE_ERROR * exact
+
+def test_exact_falls_back_to_float64(calc):
+    """Tests that non-integer results in the exact tier use float64."""
+    assert apply_precision(calc.calculate('power', 2, -1), 'power', 'exact') == 0.5
+    assert type(apply_precision(calc.calculate('sqrt', 16), 'sqrt', 'exact')) is float
+
+def test_exact_result_size_limit():
+    """Tests that oversized exact results are rejected."""
+    with pytest.raises(OverflowError, match="bits"):
+        apply_precision(2 ** (EXACT_MAX_BITS + 1), 'power', 'exact')
+
+@pytest.mark.parametrize("precision", ['exact', 'float64', 'float32'])
+def test_oversized_integer_power_fails_fast(calc, precision):
+    """Tests that huge integer powers are rejected without computing them."""
+    start = time.perf_counter()
+    result = predict_fn({'operation': 'power', 'a': 7, 'b': 30000000,
+                         'precision': precision}, calc)
+    assert time.perf_counter() - start < 0.5
+    assert result['error_code'] == 'CALCULATION_ERROR'
+
+def test_exceeds_exact_limit():
+    """Tests the pre-computation size estimate for integer powers."""
+    assert exceeds_exact_limit('power', 2, EXACT_MAX_BITS + 1)
+    assert not exceeds_exact_limit('power', 2, EXACT_MAX_BITS - 1)
+    assert not exceeds_exact_limit('power', -1, 10 ** 9)
+    assert not exceeds_exact_limit('power', 7, -30000000)
+    assert not exceeds_exact_limit('power', 7.0, 30000000)
+    assert not exceeds_exact_limit('multiply', 2, 10 ** 9)
+
+@pytest.mark.parametrize("operation, a, b, precision, expected", [
+    ('add', 1, 2, 'float64', True),
+    ('add', 1, 2, 'exact', False),
+    ('add', 1.5, 2, 'exact', True),
+    ('sqrt', 4, None, 'exact', True),
+    ('multiply', MAX_EXACT_FLOAT_INT, 3, 'float32', True),
+    ('multiply', MAX_EXACT_FLOAT_INT + 1, 3, 'float32', False),
+    ('divide', 1.0, -(2 ** 60), 'float64', False),
+])
+def test_float64_exact(operation, a, b, precision, expected):
+    """Tests which rows are fully described by a float64 result."""
+    assert float64_exact(operation, a, b, precision) is expected
+
+def test_predict_fn_precision(calc):
+    """Tests that predict_fn honours the per-request precision option."""
+    exact = predict_fn({'operation': 'power', 'a': 2, 'b': 70, 'precision': 'exact'}, calc)
+    assert exact['result'] == 2 ** 70
+    assert exact['precision'] == 'exact'
+
+    single = predict_fn({'operation': 'divide', 'a': 1, 'b': 3, 'precision': 'float32'}, calc)
+    assert single['result'] == pytest.approx(1 / 3, rel=FLOAT32_RELATIVE_ERROR)
+
+    overflow = predict_fn({'operation': 'power', 'a': 10, 'b': 40, 'precision': 'float32'}, calc)
+    assert overflow['error_code'] == 'CALCULATION_ERROR'
@@ -0,0 +1,225 @@
+"""
+Pytest unit tests for the cross-worker shared result cache
+(src/shared_cache.py) and its use from predict_fn.
+"""
+
+import multiprocessing
+import os
+import subprocess
+import sys
+from multiprocessing import shared_memory
+from pathlib import Path
+import pytest
+
+# --- Path setup to find the 'src' directory ---
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from calculator_model import MathCalculator
+from inference import predict_fn
+import shared_cache
+from shared_cache import PROBE_LIMIT, SharedResultCache
+from validation import ValidatedRequest
+
+
+@pytest.fixture
+def cache():
+    """A small cache with a per-test segment name, removed afterwards."""
+    cache = SharedResultCache(f"calc-test-{os.getpid()}-{id(object())}",
+                              slots=64)
+    yield cache
+    cache.close()
+    cache.unlink()
+
+
+def _read_in_child(name, queue):
+    """Attach to the cache from another process and report a lookup."""
+    other = SharedResultCache(name)
+    queue.put((other.get('add', 1.5, 2.0), other.get('sqrt', 9.0)))
+    other.put('multiply', 3.0, 4.0, 12.0)
+    other.close()
+
+
+def test_put_and_get(cache):
+    """Tests hits, misses, and that unary and binary keys are distinct."""
+    assert cache.get('add', 1.5, 2.0) is None
+    assert cache.put('add', 1.5, 2.0, 3.5)
+    cache.put('sqrt', 9.0, None, 3.0)
+
+    assert cache.get('add', 1.5, 2.0) == 3.5
+    assert cache.get('add', 2.0, 1.5) is None
+    assert cache.get('subtract', 1.5, 2.0) is None
+    assert cache.get('sqrt', 9.0) == 3.0
+    assert cache.stats()['hits'] == 2
+
+
+def test_keys_distinguish_ints_and_signed_zero(cache):
+    """Tests that int operands and -0.0 do not share entries with floats."""
+    cache.put('power', 2, 3, 8.0)
+    cache.put('sqrt', -0.0, None, -0.0)
+    assert cache.get('power', 2, 3) == 8.0
+    assert cache.get('power', 2.0, 3.0) is None
+    assert cache.get('sqrt', 0.0) is None
+
+
+def test_shared_across_processes(cache):
+    """Tests that another process sees entries and its writes are visible."""
+    cache.put('add', 1.5, 2.0, 3.5)
+    cache.put('sqrt', 9.0, None, 3.0)
+
+    queue = multiprocessing.Queue()
+    child = multiprocessing.Process(target=_read_in_child,
+                                    args=(cache.name, queue))
+    child.start()
+    child.join(timeout=30)
+
+    assert child.exitcode == 0
+    assert queue.get(timeout=5) == (3.5, 3.0)
+    assert cache.get('multiply', 3.0, 4.0) == 12.0
+    # The child's exit must not have unlinked the segment
+    SharedResultCache(cache.name).close()
+
+
+def _open_and_put(name, value, queue):
+    """Open the cache concurrently with other processes and insert a key."""
+    cache = SharedResultCache(name, slots=64)
+    while not cache.put('sqrt', value, None, value):
+        pass
+    queue.put(cache.slots)
+    cache.close()
+
+
+@pytest.fixture
+def segment_name():
+    """A unique segment name whose segment is removed afterwards."""
+    name = f"calc-test-{os.getpid()}-{id(object())}"
+    yield name
+    try:
+        shared_cache._posixshmem.shm_unlink('/' + name)
+    except FileNotFoundError:
+        pass
+    lock_path = Path(shared_cache.tempfile.gettempdir()) / f"{name}.lock"
+    lock_path.unlink(missing_ok=True)
+
+
+def test_concurrent_startup_shares_one_segment(segment_name):
+    """Tests that workers starting at once all attach to one table."""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    workers = [context.Process(target=_open_and_put,
+                               args=(segment_name, float(i), queue))
+               for i in range(6)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+
+    assert [worker.exitcode for worker in workers] == [0] * 6
+    assert [queue.get(timeout=5) for _ in workers] == [64] * 6
+    cache = SharedResultCache(segment_name)
+    assert all(cache.get('sqrt', float(i)) == float(i) for i in range(6))
+    cache.close()
+
+
+def test_uninitialized_segment_is_recreated(segment_name):
+    """Tests recovery from a creator that died before writing the header."""
+    abandoned = shared_memory.SharedMemory(segment_name, create=True, size=4096)
+    shared_cache._untrack(abandoned)
+    abandoned.close()
+
+    cache = SharedResultCache(segment_name, slots=64)
+    assert cache.slots == 64
+    cache.put('add', 1.0, 2.0, 3.0)
+    assert cache.get('add', 1.0, 2.0) == 3.0
+    cache.close()
+
+
+@pytest.mark.skipif(not os.path.isdir('/dev/shm'), reason="needs /dev/shm")
+def test_zero_sized_segment_is_recreated(segment_name):
+    """Tests recovery from a creator that died before sizing the segment."""
+    os.close(os.open(f"/dev/shm/{segment_name}", os.O_CREAT | os.O_RDWR))
+    cache = SharedResultCache(segment_name, slots=64)
+    assert cache.slots == 64
+    cache.close()
+
+
+def test_from_env_falls_back_without_cache(monkeypatch, capsys):
+    """Tests that a cache that cannot be opened disables itself."""
+    monkeypatch.setenv('CALCULATOR_SHARED_CACHE', 'calc-test-bad')
+    monkeypatch.setenv('CALCULATOR_SHARED_CACHE_SLOTS', '1')
+    assert SharedResultCache.from_env() is None
+    assert 'disabled' in capsys.readouterr().err
+
+
+def test_unlink_leaves_resource_tracker_quiet(segment_name):
+    """Tests that unlinking an untracked segment prints no tracker errors."""
+    script = (f"import sys; sys.path.insert(0, {str(SRC_DIR)!r}); "
+              "from shared_cache import SharedResultCache; "
+              f"cache = SharedResultCache({segment_name!r}, slots=64); "
+              "cache.close(); cache.unlink()")
+    completed = subprocess.run([sys.executable, '-c', script],
+                               capture_output=True, text=True, timeout=60)
+    assert completed.returncode == 0
+    assert completed.stderr == ''
+    assert not os.path.exists(f"/dev/shm/{segment_name}")
+
+
+def test_eviction_keeps_referenced_entries(cache):
+    """Tests that CLOCK evicts unreferenced entries before recently hit ones."""
+    keys = [float(i) for i in range(cache.slots * 2)]
+    cache.put('sqrt', keys[0], None, 0.0)
+    for key in keys[1:]:
+        # Keep the first entry referenced while others churn
+        assert cache.get('sqrt', keys[0]) == 0.0
+        cache.put('sqrt', key, None, key)
+
+    assert cache.get('sqrt', keys[0]) == 0.0
+    cached = sum(cache.get('sqrt', key) is not None for key in keys)
+    assert cached <= cache.slots
+
+
+def test_rejects_too_few_slots():
+    """Tests that a table smaller than the probe window is rejected."""
+    with pytest.raises(ValueError):
+        SharedResultCache('calc-test-tiny', slots=PROBE_LIMIT - 1)
+
+
+@pytest.mark.parametrize("row, expected", [
+    (ValidatedRequest('add', 1, 2, 'float64'), True),
+    (ValidatedRequest('sin', 30, None, 'float32'), True),
+    (ValidatedRequest('add', 1, 2, 'exact'), False),
+    (ValidatedRequest('add', 1.5, 2, 'exact'), True),
+    (ValidatedRequest('multiply', 2 ** 60, 3, 'float64'), False),
+])
+def test_cacheable(row, expected):
+    """Tests which validated rows can use the float64 cache."""
+    assert SharedResultCache.cacheable(row) is expected
+
+
+def test_predict_fn_uses_cache(cache):
+    """Tests that predict_fn fills the cache and answers later requests from it."""
+    model = MathCalculator()
+    model.result_cache = cache
+    payload = {'operation': 'sin', 'a': 30}
+
+    first = predict_fn(payload, model)
+    assert cache.get('sin', 30) == first['result']
+
+    # A poisoned entry proves the second request is served from the cache
+    cache.put('sin', 30, None, 0.25)
+    assert predict_fn(payload, model)['result'] == 0.25
+    assert predict_fn(dict(payload, precision='float32'), model)['result'] == 0.25
+
+    exact = predict_fn({'operation': 'add', 'a': 2, 'b': 3,
+                        'precision': 'exact'}, model)
+    assert exact['result'] == 5 and type(exact['result']) is int
+    assert cache.get('add', 2, 3) is None
+
+
+def test_predict_fn_does_not_cache_errors(cache):
+    """Tests that failed calculations are not cached."""
+    model = MathCalculator()
+    model.result_cache = cache
+    result = predict_fn({'operation': 'divide', 'a': 1, 'b': 0}, model)
+    assert result['status'] == 'error'
+    assert cache.get('divide', 1, 0) is None
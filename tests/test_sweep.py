@@ -0,0 +1,235 @@
+"""
+Pytest unit tests for server-side range/grid sweeps (src/sweep.py) and
+MathCalculator.calculate_array.
+"""
+
+import base64
+import json
+import math
+import sys
+from pathlib import Path
+import pytest
+
+# --- Path setup to find the 'src' directory ---
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+import numpy as np
+
+import sweep
+from calculator_model import MathCalculator
+from inference import output_fn, predict_fn
+from sweep import RESPONSE_BUDGET_BYTES, RangeSpec, output_bytes, run_sweep
+
+
+@pytest.fixture(scope="module")
+def calc():
+    return MathCalculator()
+
+
+def test_calculate_array_matches_scalar(calc):
+    """Tests that the array path agrees with calculate() to within an ulp."""
+    values = [0.5, 1.0, 2.0, 30.0, 45.0, 123.456]
+    for operation in calc.operations:
+        b = [2.0] * len(values) if operation in ('add', 'subtract', 'multiply',
+                                                 'divide', 'power') else None
+        result, invalid = calc.calculate_array(operation, values, b)
+        assert not invalid.any()
+        for i, a in enumerate(values):
+            expected = calc.calculate(operation, a, b[i] if b else None)
+            assert result[i] == pytest.approx(expected, rel=4e-16, abs=1e-300)
+
+def test_calculate_array_flags_errors(calc):
+    """Tests that scalar errors become NaN and are flagged."""
+    result, invalid = calc.calculate_array('divide', [1, 2], [0, 4])
+    assert invalid.tolist() == [True, False]
+    assert math.isnan(result[0]) and result[1] == 0.5
+    _, invalid = calc.calculate_array('power', [-8, 10], [0.5, 400])
+    assert invalid.tolist() == [True, True]
+
+def test_calculate_array_float32(calc):
+    """Tests that float32 results are returned as float32."""
+    result, _ = calc.calculate_array('divide', [1], [3], dtype=np.float32)
+    assert result.dtype == np.float32
+
+@pytest.mark.parametrize("spec", [
+    {'start': 0, 'stop': 1, 'step': 0.1},
+    {'start': 0, 'stop': 360, 'step': 0.001},
+    {'start': 5, 'stop': -5, 'step': -0.3},
+])
+def test_range_spec_matches_arange(spec):
+    """Tests that start/stop/step ranges follow numpy.arange."""
+    expected = np.arange(spec['start'], spec['stop'], spec['step'])
+    rng = RangeSpec.from_json(spec)
+    assert len(rng) == len(expected)
+    np.testing.assert_allclose(rng.values(np.arange(len(rng))), expected,
+                               rtol=0, atol=1e-12)
+
+def test_range_spec_matches_linspace():
+    """Tests that linspace ranges follow numpy.linspace, ending exactly at stop."""
+    rng = RangeSpec.from_json({'linspace': {'start': 0.1, 'stop': 0.7, 'num': 7}})
+    values = rng.values(np.arange(7))
+    np.testing.assert_allclose(values, np.linspace(0.1, 0.7, 7), rtol=1e-15)
+    assert values[-1] == 0.7
+
+@pytest.mark.parametrize("spec, message", [
+    ({'start': 0, 'stop': 1, 'step': 0}, "must not be zero"),
+    ({'start': 1, 'stop': 0, 'step': 1}, "empty"),
+    ({'start': '0', 'stop': 1, 'step': 1}, "must be a number"),
+    ({'linspace': {'start': 0, 'stop': 1, 'num': 0}}, "positive integer"),
+])
+def test_range_spec_errors(spec, message):
+    """Tests malformed range specs."""
+    with pytest.raises(ValueError, match=message):
+        RangeSpec.from_json(spec)
+
+def test_summary_is_chunked(calc, monkeypatch):
+    """Tests that chunked summaries match a fully materialized sweep."""
+    monkeypatch.setattr(sweep, 'CHUNK_SIZE', 7)
+    a = RangeSpec.from_json({'start': -3, 'stop': 50, 'step': 0.5})
+    summary = run_sweep(calc, 'log', a, None)
+
+    full, invalid = calc.calculate_array('log', np.arange(-3, 50, 0.5))
+    valid = full[~invalid]
+    assert summary['count'] == full.size
+    assert summary['invalid'] == int(invalid.sum())
+    assert summary['min'] == valid.min() and summary['max'] == valid.max()
+    assert summary['mean'] == pytest.approx(valid.mean())
+    assert full[summary['argmin']] == valid.min()
+    assert full[summary['argmax']] == valid.max()
+
+def test_grid_binary_output(calc):
+    """Tests a Cartesian grid returned as base64 float32."""
+    a = RangeSpec.from_json({'start': 1, 'stop': 4, 'step': 1})
+    b = RangeSpec.from_json({'linspace': {'start': 0, 'stop': 2, 'num': 5}})
+    result = run_sweep(calc, 'power', a, b, grid=True, output='binary',
+                       precision='float32')
+    assert result['shape'] == [3, 5] and result['dtype'] == '<f4'
+    decoded = np.frombuffer(base64.b64decode(result['data']), dtype='<f4')
+    expected = np.power.outer([1.0, 2.0, 3.0], np.linspace(0, 2, 5))
+    np.testing.assert_allclose(decoded.reshape(3, 5), expected, rtol=1e-7)
+
+def test_scalar_broadcast_against_range(calc):
+    """Tests that a plain number broadcasts against a range."""
+    a = RangeSpec.from_json({'start': 0, 'stop': 3, 'step': 1})
+    result = run_sweep(calc, 'divide', 1, a, output='values')
+    assert result['values'] == [None, 1.0, 0.5]
+    assert result['invalid'] == 1
+
+def test_float32_values_match_scalar_tier(calc):
+    """Tests that float32 values use the scalar tier's shortest digits."""
+    a = RangeSpec.from_json({'start': 0, 'stop': 90, 'step': 1})
+    result = run_sweep(calc, 'sin', a, None, output='values',
+                       precision='float32')
+    expected = [predict_fn({'operation': 'sin', 'a': degrees,
+                            'precision': 'float32'}, calc)['result']
+                for degrees in range(90)]
+    assert result['values'] == expected
+    assert result['values'][1] == 0.017452406
+
+def test_predict_fn_sweep(calc):
+    """Tests a sweep request end to end through predict_fn."""
+    payload = {'operation': 'sin', 'a': {'start': 0, 'stop': 360, 'step': 0.001}}
+    prediction = predict_fn(payload, calc)
+    assert prediction['status'] == 'success'
+    assert prediction['input_a'] == payload['a']
+    assert prediction['result']['count'] == 360000
+    assert prediction['result']['max'] == pytest.approx(1.0)
+    assert prediction['result']['argmax'] == 90000
+
+@pytest.mark.parametrize("payload, error_code", [
+    ({'operation': 'add', 'a': {'start': 0, 'stop': 3, 'step': 1},
+      'b': {'start': 0, 'stop': 4, 'step': 1}}, 'INVALID_RANGE'),
+    ({'operation': 'add', 'a': {'start': 0, 'stop': 3, 'step': 1}, 'b': 1,
+      'grid': True}, 'INVALID_RANGE'),
+    ({'operation': 'sin', 'a': {'start': 0, 'stop': 1e9, 'step': 1},
+      'output': 'values'}, 'INVALID_RANGE'),
+    ({'operation': 'sin', 'a': {'start': 0, 'stop': 1, 'step': 0.1},
+      'output': 'csv'}, 'INVALID_OUTPUT'),
+    ({'operation': 'sin', 'a': {'start': 0, 'stop': 1}}, 'INVALID_RANGE'),
+    ({'operation': 'sin', 'a': {'start': -1e308, 'stop': 1e308, 'step': 1}},
+     'INVALID_RANGE'),
+    ({'operation': 'sin', 'a': {'start': 0, 'stop': 1e300, 'step': 1}},
+     'INVALID_RANGE'),
+    ({'operation': 'sin', 'a': {'linspace': {'start': -1e308, 'stop': 1e308,
+                                             'num': 3}}}, 'INVALID_RANGE'),
+    ({'operation': 'power', 'a': {'start': 0, 'stop': 10, 'step': 1},
+      'b': 10 ** 400}, 'INVALID_RANGE'),
+])
+def test_predict_fn_sweep_errors(calc, payload, error_code):
+    """Tests that invalid sweeps are rejected before computation."""
+    prediction = predict_fn(payload, calc)
+    assert prediction['status'] == 'error'
+    assert prediction['error_code'] == error_code
+
+def test_predict_fn_batch_with_overflowing_sweep(calc):
+    """Tests that an overflowing sweep row does not fail the whole batch."""
+    results = predict_fn([
+        {'operation': 'sin', 'a': {'start': -1e308, 'stop': 1e308, 'step': 1}},
+        {'operation': 'add', 'a': 1, 'b': 2},
+    ], calc)
+    assert results[0]['error_code'] == 'INVALID_RANGE'
+    assert results[1]['result'] == 3
+
+@pytest.mark.parametrize("output, precision", [
+    ('values', 'float64'), ('values', 'float32'),
+    ('binary', 'float64'), ('binary', 'float32'),
+])
+def test_output_bytes_bounds_response(calc, output, precision):
+    """Tests that output_bytes is an upper bound on the serialized output."""
+    a = RangeSpec.from_json({'linspace': {'start': -1e-300, 'stop': 1e300,
+                                          'num': 2000}})
+    b = RangeSpec.from_json({'start': -3.3, 'stop': 3.3, 'step': 0.33})
+    result = run_sweep(calc, 'multiply', a, b, grid=True, output=output,
+                       precision=precision)
+    field = result['values'] if output == 'values' else result['data']
+    assert len(json.dumps(field)) <= output_bytes(result['shape'], output,
+                                                  precision)
+
+@pytest.mark.parametrize("output, precision", [
+    ('values', 'float64'), ('values', 'float32'),
+    ('binary', 'float64'), ('binary', 'float32'),
+])
+def test_largest_allowed_sweep_fits_response_limit(calc, output, precision):
+    """Tests that the largest accepted sweep stays within the response limit."""
+    low, high = 1, RESPONSE_BUDGET_BYTES
+    while low < high:
+        middle = (low + high + 1) // 2
+        if output_bytes((middle,), output, precision) <= RESPONSE_BUDGET_BYTES:
+            low = middle
+        else:
+            high = middle - 1
+    elements = low
+    # Long results: about 23 digits and exponent characters in float64
+    payload = {'operation': 'divide', 'a': -1.2345678901234567e-30,
+               'b': {'linspace': {'start': 3.0001, 'stop': 7.0001,
+                                  'num': elements}},
+               'output': output, 'precision': precision}
+    prediction = predict_fn(payload, calc)
+    assert prediction['status'] == 'success'
+    body, _ = output_fn(prediction)
+    assert len(body) <= sweep.MAX_RESPONSE_BYTES
+    payload['b']['linspace']['num'] = elements + 1
+    assert predict_fn(payload, calc)['error_code'] == 'INVALID_RANGE'
+
+def test_predict_fn_rejects_sweep_over_response_budget(calc):
+    """Tests that a float64 values sweep over the response budget is rejected."""
+    payload = {'operation': 'sin', 'a': {'start': 0, 'stop': 300000, 'step': 1},
+               'output': 'values'}
+    prediction = predict_fn(payload, calc)
+    assert prediction['error_code'] == 'INVALID_RANGE'
+    assert 'response budget' in prediction['error']
+    # The same sweep fits as float32 binary
+    payload.update(output='binary', precision='float32')
+    assert predict_fn(payload, calc)['status'] == 'success'
+
+def test_predict_fn_batch_shares_response_budget(calc):
+    """Tests that sweep rows of one batch share one response budget."""
+    row = {'operation': 'sin', 'a': {'start': 0, 'stop': 200000, 'step': 1},
+           'output': 'values'}
+    results = predict_fn([row, {'operation': 'add', 'a': 1, 'b': 2}, row,
+                          dict(row, output='summary')], calc)
+    assert [r['status'] for r in results] == [
+        'success', 'success', 'error', 'success']
+    assert results[2]['error_code'] == 'INVALID_RANGE'
+    assert 'earlier rows' in results[2]['error']
@@ -0,0 +1,77 @@
+"""
+Pytest unit tests for the request schema validator (src/validation.py).
+"""
+
+import sys
+from pathlib import Path
+import pytest
+
+# --- Path setup to find the 'src' directory ---
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from validation import (ARITY_MISMATCH, INVALID_PRECISION, INVALID_REQUEST,
+                        INVALID_TYPE, MISSING_PARAMETER, UNSUPPORTED_OPERATION,
+                        ValidatedRequest, ValidationError, get_validator)
+
+
+def test_get_validator_is_compiled_once():
+    """Tests that validators are cached per schema version."""
+    assert get_validator('1') is get_validator('1')
+
+def test_get_validator_unknown_version():
+    """Tests that an unknown schema version is rejected."""
+    with pytest.raises(ValueError, match="Unknown schema version"):
+        get_validator('does-not-exist')
+
+@pytest.mark.parametrize("payload, expected", [
+    ({'operation': 'add', 'a': 10, 'b': 5}, ('add', 10, 5, 'float64')),
+    ({'operation': 'power', 'a': 2.5, 'b': 2}, ('power', 2.5, 2, 'float64')),
+    ({'operation': 'sqrt', 'a': 16}, ('sqrt', 16, None, 'float64')),
+    ({'operation': 'sin', 'a': 30, 'b': None}, ('sin', 30, None, 'float64')),
+    ({'operation': 'add', 'a': 1, 'b': 2, 'precision': 'exact'}, ('add', 1, 2, 'exact')),
+])
+def test_validate_valid_rows(payload, expected):
+    """Tests that valid rows are returned as ValidatedRequest tuples."""
+    assert get_validator().validate(payload) == expected
+
+@pytest.mark.parametrize("payload, code", [
+    ({'operation': 'add', 'a': '10', 'b': 5}, INVALID_TYPE),
+    ({'operation': 'add', 'a': 10, 'b': True}, INVALID_TYPE),
+    ({'operation': 'add', 'a': [1], 'b': 5}, INVALID_TYPE),
+    ({'operation': 'add', 'a': 10}, MISSING_PARAMETER),
+    ({'a': 10}, MISSING_PARAMETER),
+    ({'operation': 'sqrt', 'a': 16, 'b': 2}, ARITY_MISMATCH),
+    ({'operation': 'invent', 'a': 1}, UNSUPPORTED_OPERATION),
+    ({'operation': ['add'], 'a': 1}, UNSUPPORTED_OPERATION),
+    ({'operation': 'add', 'a': 1, 'b': 2, 'precision': 'float16'}, INVALID_PRECISION),
+    ({'operation': 'add', 'a': 1, 'b': 2, 'precision': ['exact']}, INVALID_PRECISION),
+    ("add 1 2", INVALID_REQUEST),
+])
+def test_validate_error_codes(payload, code):
+    """Tests that invalid rows raise ValidationError with the right code."""
+    with pytest.raises(ValidationError) as excinfo:
+        get_validator().validate(payload)
+    assert excinfo.value.code == code
+
+def test_validation_error_carries_known_operation():
+    """Tests that errors name the operation once it has been recognised."""
+    validator = get_validator()
+    with pytest.raises(ValidationError) as excinfo:
+        validator.validate({'operation': 'add', 'a': 'x', 'b': 2})
+    assert excinfo.value.operation == 'add'
+    with pytest.raises(ValidationError) as excinfo:
+        validator.validate({'operation': 'invent', 'a': 1})
+    assert excinfo.value.operation is None
+
+def test_validate_batch_reports_errors_in_place():
+    """Tests that a batch is validated in one pass without stopping on errors."""
+    rows = get_validator().validate_batch([
+        {'operation': 'add', 'a': 1, 'b': 2},
+        {'operation': 'add', 'a': '1', 'b': 2},
+        {'operation': 'cos', 'a': 0},
+    ])
+    assert rows[0] == ValidatedRequest('add', 1, 2, 'float64')
+    assert isinstance(rows[1], ValidationError)
+    assert rows[1].code == INVALID_TYPE
+    assert rows[2] == ValidatedRequest('cos', 0, None, 'float64')
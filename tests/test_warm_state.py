@@ -0,0 +1,124 @@
+"""
+Pytest unit tests for persistent warm-start state (src/warm_state.py) and
+its loading from model_fn.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+import numpy as np
+import pytest
+
+# --- Path setup to find the 'src' directory ---
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from inference import model_fn
+from shared_cache import SharedResultCache
+from warm_state import (FORMAT_VERSION, MANIFEST_FILE, TRIG_FILE,
+                        WARM_STATE_DIR, build_warm_state, load_warm_state)
+
+
+@pytest.fixture
+def make_cache():
+    """Factory for small shared caches, removed afterwards."""
+    caches = []
+
+    def make():
+        cache = SharedResultCache(
+            f"calc-warm-{os.getpid()}-{len(caches)}", slots=4096)
+        caches.append(cache)
+        return cache
+
+    yield make
+    for cache in caches:
+        cache.close()
+        cache.unlink()
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    """A model directory with freshly built warm-start state."""
+    build_warm_state(str(tmp_path / WARM_STATE_DIR))
+    return tmp_path
+
+
+def _edit_manifest(model_dir, **changes):
+    path = model_dir / WARM_STATE_DIR / MANIFEST_FILE
+    manifest = json.loads(path.read_text())
+    manifest.update(changes)
+    path.write_text(json.dumps(manifest))
+
+
+def test_build_and_load(model_dir):
+    """Tests that state round-trips and the trig table is memory-mapped."""
+    state = load_warm_state(str(model_dir))
+    assert state.manifest['format_version'] == FORMAT_VERSION
+    assert state.manifest['schema_versions'] == ['1']
+    assert isinstance(state.trig_table, np.memmap)
+    assert state.trig_table.shape == (3, 360)
+    assert state.trig_table[0, 90] == 1.0
+    assert state.snapshot is None
+
+
+def test_missing_state_is_ignored(tmp_path):
+    """Tests that a model_dir without state (or no model_dir) starts cold."""
+    assert load_warm_state(str(tmp_path)) is None
+    assert load_warm_state(None) is None
+
+
+@pytest.mark.parametrize("changes", [
+    {'format_version': FORMAT_VERSION + 1},
+    {'operations': {'1': {'add': 2}}},
+    {'operation_codes': {'add': 99}},
+])
+def test_incompatible_state_is_ignored(model_dir, changes, capsys):
+    """Tests that state from another format or code version is not used."""
+    _edit_manifest(model_dir, **changes)
+    assert load_warm_state(str(model_dir)) is None
+    assert 'Ignoring warm-start state' in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("row, degrees", [(0, 0), (1, 137), (2, 359)])
+def test_mismatched_trig_table_is_ignored(model_dir, row, degrees, capsys):
+    """Tests that a table differing from this platform in any entry is not used."""
+    path = model_dir / WARM_STATE_DIR / TRIG_FILE
+    table = np.load(path)
+    # One ulp, as a different libm might round
+    table[row, degrees] = np.nextafter(table[row, degrees], np.inf)
+    np.save(path, table)
+    assert load_warm_state(str(model_dir)) is None
+    assert f"({degrees}) on this platform" in capsys.readouterr().err
+
+
+def test_snapshot_seeds_cache(tmp_path, make_cache):
+    """Tests that a cache snapshot is saved and restored with operand types."""
+    cache = make_cache()
+    cache.put('power', 2, 10, 1024.0)
+    cache.put('divide', 1.0, 3.0, 1 / 3)
+    cache.put('log', 2.5, None, 0.9162907318741551)
+    build_warm_state(str(tmp_path / WARM_STATE_DIR), cache=cache)
+
+    state = load_warm_state(str(tmp_path))
+    assert len(state.snapshot) == 3
+
+    fresh = make_cache()
+    assert state.seed(fresh) == 3 * 360 + 3
+    assert fresh.get('power', 2, 10) == 1024.0
+    assert fresh.get('power', 2.0, 10.0) is None
+    assert fresh.get('divide', 1.0, 3.0) == 1 / 3
+    assert fresh.get('log', 2.5) == 0.9162907318741551
+    assert fresh.get('sin', 30) == state.trig_table[0, 30]
+
+
+def test_model_fn_applies_state(model_dir, make_cache, monkeypatch):
+    """Tests that model_fn attaches the state and seeds the shared cache."""
+    import inference
+    cache = make_cache()
+    monkeypatch.setattr(inference, 'SHARED_CACHE', cache)
+    model = model_fn(str(model_dir))
+    assert model.warm_state.trig_table.shape == (3, 360)
+    assert model.result_cache is cache
+    assert cache.get('cos', 60) == model.operations['cos'](60, None)
+